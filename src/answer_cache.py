@@ -0,0 +1,58 @@
+"""In-memory semantic cache of recently generated answers.
+
+Answers are stored against the query embedding that produced them and
+looked up by cosine similarity. Entries are scoped (per user) because the
+generated text may reflect that user's stored summary.
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+# === CONFIG ===
+MAX_ENTRIES_PER_SCOPE = 200
+MIN_SIMILARITY = 0.92
+
+class SemanticAnswerCache:
+    def __init__(self, max_entries=MAX_ENTRIES_PER_SCOPE, min_similarity=MIN_SIMILARITY):
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self._entries = {}  # scope -> deque of (unit vector, answer)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector):
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def add(self, scope, query_vector, answer):
+        with self._lock:
+            entries = self._entries.setdefault(scope, deque(maxlen=self.max_entries))
+            entries.append((self._unit(query_vector), answer))
+
+    def discard(self, scope, answer):
+        """Drop every entry of this scope holding `answer`, e.g. once it has been rated 👎."""
+        with self._lock:
+            entries = self._entries.get(scope)
+            if entries:
+                kept = [entry for entry in entries if entry[1] != answer]
+                self._entries[scope] = deque(kept, maxlen=self.max_entries)
+
+    def lookup(self, scope, query_vector):
+        """Return the closest cached answer for this scope, or None below the similarity threshold."""
+        with self._lock:
+            entries = list(self._entries.get(scope, ()))
+        if not entries:
+            return None
+        matrix = np.stack([vec for vec, _ in entries])
+        scores = matrix @ self._unit(query_vector)
+        best = int(np.argmax(scores))
+        if scores[best] < self.min_similarity:
+            return None
+        return entries[best][1]
+
+# Process-wide instance shared by every Streamlit session
+answer_cache = SemanticAnswerCache()
+
+__all__ = ["SemanticAnswerCache", "answer_cache"]
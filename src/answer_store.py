@@ -0,0 +1,64 @@
+"""Precomputed answers for the most frequent CounselChat question intents.
+
+The store is built offline by build_answer_store.py. Every entry carries the
+store version it was generated with (a hash of the prompt template and the
+chat model), so a template or model change makes old entries invisible until
+the job is re-run. Generated answers are only served once a person has
+approved them with review_answers.py; the automatic checks at build time
+just decide what is worth reviewing. A 👎 on a served answer puts its
+cluster back in the review queue with `flag_for_review`.
+"""
+import hashlib
+
+from rag_chain import embedding, llm, template_text
+from store_meta import open_chroma
+
+# === CONFIG ===
+PERSIST_DIR = "chroma_db_answers"
+MAX_DISTANCE = 0.08   # cosine distance; only near-paraphrases are served directly
+
+def store_version():
+    return hashlib.sha256(f"{llm.model}\n{template_text}".encode("utf-8")).hexdigest()[:16]
+
+def open_answer_store():
+    return open_chroma(PERSIST_DIR, embedding, collection_metadata={"hnsw:space": "cosine"})
+
+answer_store = open_answer_store()
+STORE_VERSION = store_version()
+
+def lookup_precomputed(query_vector):
+    """Return (answer, cluster_id) for a vetted precomputed answer on a high-confidence match, otherwise None."""
+    hits = answer_store.similarity_search_by_vector_with_relevance_scores(
+        query_vector, k=1, filter={"$and": [{"store_version": STORE_VERSION}, {"reviewed": True}]}
+    )
+    if not hits:
+        return None
+    doc, distance = hits[0]
+    if distance > MAX_DISTANCE or not doc.metadata.get("vetted") or not doc.metadata.get("reviewed"):
+        return None
+    return doc.metadata["answer"], doc.metadata["cluster_id"]
+
+def _update_cluster(cluster_id, **fields):
+    entries = answer_store._collection.get(
+        where={"$and": [{"store_version": STORE_VERSION}, {"cluster_id": cluster_id}]}, include=["metadatas"]
+    )
+    metadatas = [
+        {**metadata, **{name: value(metadata) if callable(value) else value for name, value in fields.items()}}
+        for metadata in entries["metadatas"]
+    ]
+    if entries["ids"]:
+        answer_store._collection.update(ids=entries["ids"], metadatas=metadatas)
+    return len(entries["ids"])
+
+def set_review(cluster_id, approved, reviewer):
+    """Record a human decision for every question of a cluster in the current version."""
+    return _update_cluster(
+        cluster_id, reviewed=bool(approved), vetted=lambda metadata: metadata["vetted"] and bool(approved),
+        reviewer=reviewer,
+    )
+
+def flag_for_review(cluster_id, reason):
+    """Stop serving a cluster's answer and queue it for review_answers.py again, e.g. after a 👎."""
+    return _update_cluster(cluster_id, reviewed=False, flagged=reason)
+
+__all__ = ["PERSIST_DIR", "store_version", "open_answer_store", "lookup_precomputed", "set_review", "flag_for_review"]
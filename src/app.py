@@ -1,14 +1,11 @@
 import streamlit as st
-import datetime
-import os
 from rag_chain import qa_chain, vectorstore
+from journal_ui import render_journal
 
 CRISIS_KEYWORDS = [
     "suicide", "kill myself", "self harm", "end my life", "want to die",
     "hurting myself", "cutting", "hopeless", "no reason to live"
 ]
-JOURNAL_DIR = "journal_entries"
-os.makedirs(JOURNAL_DIR, exist_ok=True)
 
 def check_crisis(text):
     text = text.lower()
@@ -51,25 +48,4 @@ with tab1:
     st.text_input("Your message:", key="user_input", on_change=process_user_input)
 
 with tab2:
-    st.header("📓 Daily Journal")
-    today = datetime.date.today().isoformat()
-    journal_text = st.text_area("Write about your day:", height=250)
-
-    if st.button("Save Journal Entry"):
-        if journal_text.strip():
-            filename = f"{JOURNAL_DIR}/{today}.txt"
-            with open(filename, "a", encoding="utf-8") as f:
-                f.write(f"{datetime.datetime.now().isoformat()}\n{journal_text}\n\n")
-            st.success(f"Journal saved for {today}.")
-        else:
-            st.warning("Please write something before saving.")
-
-    if st.checkbox("Show Previous Entries"):
-        entries = sorted(os.listdir(JOURNAL_DIR))
-        if not entries:
-            st.info("No journal entries found yet.")
-        else:
-            for entry in entries:
-                with open(os.path.join(JOURNAL_DIR, entry), encoding="utf-8") as f:
-                    st.subheader(entry.replace(".txt", ""))
-                    st.text(f.read())
+    render_journal(st.session_state.get("username", "guest"))
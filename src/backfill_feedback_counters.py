@@ -0,0 +1,50 @@
+from collections import Counter
+
+from pymongo import UpdateOne
+
+from db import get_bot_db
+from feedback_counters import COUNTER_FIELDS, normalize_question
+
+# === CONFIG ===
+BATCH_SIZE = 1000
+
+db = get_bot_db()
+
+# === Aggregate Raw Feedback ===
+pipeline = [
+    {"$match": {"feedback": {"$in": list(COUNTER_FIELDS)}}},
+    {"$group": {"_id": {"user": "$user", "question": "$question", "feedback": "$feedback"}, "count": {"$sum": 1}}},
+]
+
+user_counts = Counter()
+question_counts = Counter()
+question_text = {}
+for row in db["feedback"].aggregate(pipeline, allowDiskUse=True):
+    key = normalize_question(row["_id"]["question"])
+    field = COUNTER_FIELDS[row["_id"]["feedback"]]
+    user_counts[(row["_id"]["user"], key, field)] += row["count"]
+    question_counts[(key, field)] += row["count"]
+    question_text.setdefault(key, row["_id"]["question"])
+
+print(f"🔍 Counters to write: {len(user_counts)} user, {len(question_counts)} question")
+
+# === Write Counters ===
+# $set (not $inc) so the job is idempotent; run it while feedback is quiet
+ops = [
+    UpdateOne({"scope": "user", "question_key": key, "user": user}, {"$set": {field: count}}, upsert=True)
+    for (user, key, field), count in user_counts.items()
+]
+ops += [
+    UpdateOne(
+        {"scope": "question", "question_key": key, "user": None},
+        {"$set": {field: count, "question": question_text[key]}},
+        upsert=True,
+    )
+    for (key, field), count in question_counts.items()
+]
+
+for i in range(0, len(ops), BATCH_SIZE):
+    db["feedback_counters"].bulk_write(ops[i:i + BATCH_SIZE], ordered=False)
+    print(f"✅ Wrote counters {i} → {min(i + BATCH_SIZE, len(ops))}")
+
+print("🎉 Feedback counters backfilled.")
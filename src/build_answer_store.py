@@ -0,0 +1,100 @@
+import sys
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from langchain.schema import Document
+
+from rag_chain import embedding, generate_answer
+from answer_store import PERSIST_DIR, store_version, open_answer_store
+from crisis import check_crisis
+
+# === CONFIG ===
+CSV_PATH = Path("counsel_chat.csv")
+MANIFEST = Path(PERSIST_DIR) / "answer_store.json"
+TOP_QUESTIONS = 300          # most viewed/upvoted questions considered
+CLUSTER_SIMILARITY = 0.88    # cosine similarity to join an existing intent cluster
+CONTEXT_ANSWERS = 2          # top therapist answers used as context per cluster
+MIN_ANSWER_CHARS = 80
+FORCE = "--force" in sys.argv
+
+version = store_version()
+if MANIFEST.exists() and json.loads(MANIFEST.read_text()).get("store_version") == version and not FORCE:
+    print(f"✅ Answer store already built for version {version}. Use --force to rebuild.")
+    sys.exit(0)
+
+# === Rank Questions by Popularity ===
+df = pd.read_csv(CSV_PATH)
+df["upvotes"] = df["upvotes"].fillna(0)
+df["views"] = df["views"].fillna(0)
+df = df.sort_values("upvotes", ascending=False)
+
+questions = (
+    df.groupby("questionID")
+    .agg(
+        title=("questionTitle", "first"),
+        text=("questionText", "first"),
+        upvotes=("upvotes", "sum"),
+        views=("views", "max"),
+        answers=("answerText", lambda answers: [a for a in answers if isinstance(a, str)][:CONTEXT_ANSWERS]),
+    )
+    .reset_index()
+)
+questions["popularity"] = questions["views"] + 10 * questions["upvotes"]
+questions = questions.sort_values("popularity", ascending=False).head(TOP_QUESTIONS).reset_index(drop=True)
+questions["query"] = (questions["title"].fillna("") + " " + questions["text"].fillna("")).str.strip()
+print(f"🔍 Top questions considered: {len(questions)}")
+
+# === Embed and Cluster Intents ===
+vectors = np.asarray(embedding.embed_documents(questions["query"].tolist()), dtype=np.float32)
+vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+# Greedy pass in popularity order: each question joins the closest seed above the threshold
+cluster_of = np.full(len(questions), -1)
+seeds = []
+for i in range(len(questions)):
+    if seeds:
+        sims = vectors[seeds] @ vectors[i]
+        best = int(np.argmax(sims))
+        if sims[best] >= CLUSTER_SIMILARITY:
+            cluster_of[i] = best
+            continue
+    cluster_of[i] = len(seeds)
+    seeds.append(i)
+print(f"🧩 Intent clusters: {len(seeds)}")
+
+def is_vetted(question, answer):
+    """Automatic checks; anything failing is never offered for review or served."""
+    if check_crisis(question):
+        return False
+    return len(answer.strip()) >= MIN_ANSWER_CHARS
+
+# === Generate and Store ===
+store = open_answer_store()
+store.delete_collection()
+store = open_answer_store()
+
+for cluster_id, seed in enumerate(seeds):
+    members = np.flatnonzero(cluster_of == cluster_id)
+    representative = questions.loc[seed, "query"]
+    context_docs = [Document(page_content=a) for a in questions.loc[seed, "answers"]]
+    answer = generate_answer(representative, context_docs)
+    vetted = is_vetted(" ".join(questions.loc[members, "query"]), answer)
+
+    # Every member question is indexed so paraphrases within the cluster match directly
+    store._collection.add(
+        ids=[f"{version}-{cluster_id}-{m}" for m in members],
+        embeddings=vectors[members].tolist(),
+        documents=questions.loc[members, "query"].tolist(),
+        metadatas=[
+            # Nothing is served until a person approves it with review_answers.py
+            {"answer": answer, "cluster_id": cluster_id, "store_version": version, "vetted": vetted, "reviewed": False}
+            for _ in members
+        ],
+    )
+    print(f"{'✅' if vetted else '⚠️'} Cluster {cluster_id + 1}/{len(seeds)} ({len(members)} questions)")
+
+MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+MANIFEST.write_text(json.dumps({"store_version": version, "clusters": len(seeds), "questions": len(questions)}))
+print(f"🎉 Answer store built for version {version}. Run review_answers.py to approve answers before they are served.")
@@ -0,0 +1,132 @@
+"""Two-level cache for query embeddings, retrieval results and answers.
+
+L1 is an in-process LRU. L2 is a key-value service shared by every replica,
+spoken to over the Redis protocol: a real Redis in production, or
+kv_standin.py locally and in tests. Set CACHE_URL (e.g.
+redis://localhost:6379/0) to enable L2; it needs the optional `redis`
+package, and without either the tier runs on L1 alone.
+
+Values are JSON so nothing executable is ever read back from the shared
+service. Keys are built by the caller from everything that determines the
+value (embedding model, prompt template, chat model, collection snapshot),
+so a change to any of them simply stops old entries from being hit; an
+entry known to be bad (e.g. an answer rated 👎) is dropped with `delete`.
+`delete` only reaches this replica's L1, so with L2 enabled the L1 copies of
+deletable kinds live at most L1_MAX_TTL_S and other replicas stop serving a
+deleted entry soon after. An unreachable L2 is skipped for L2_RETRY_S and
+never fails a request.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# === CONFIG ===
+CACHE_URL = os.environ.get("CACHE_URL", "")
+L1_ENTRIES = int(os.environ.get("CACHE_L1_ENTRIES", "2048"))
+L2_RETRY_S = 30.0
+L2_TIMEOUT_S = 0.2
+L1_MAX_TTL_S = {"answer": 15.0}   # kinds other replicas may delete; L1 re-reads them from L2 this often
+L1_REFILL_TTL_S = 300.0   # L1 lifetime of other kinds read back from L2 (their remaining L2 TTL is unknown)
+KEY_PREFIX = "rag"
+
+logger = logging.getLogger(__name__)
+
+def key_digest(*parts):
+    """Stable short digest of the parts that identify a cached value."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:32]
+
+class LRUCache:
+    def __init__(self, max_entries=L1_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[1] is not None and item[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def set(self, key, value, ttl_s=None):
+        with self._lock:
+            self._entries[key] = (value, None if ttl_s is None else time.monotonic() + ttl_s)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+def connect_l2(url=CACHE_URL):
+    """A redis-py client for `url`, or None when no shared cache is configured or available."""
+    if not url:
+        return None
+    try:
+        import redis
+    except ImportError:
+        logger.warning("CACHE_URL is set but the redis package is not installed; using the in-process cache only")
+        return None
+    return redis.Redis.from_url(url, socket_timeout=L2_TIMEOUT_S, socket_connect_timeout=L2_TIMEOUT_S)
+
+class CacheTier:
+    def __init__(self, l2=None, l1_entries=L1_ENTRIES):
+        self.l1 = LRUCache(l1_entries)
+        self.l2 = l2
+        self._l2_down_until = 0.0
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0}
+
+    def _l2_call(self, fn, *args, **kwargs):
+        if self.l2 is None or time.monotonic() < self._l2_down_until:
+            return None
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            self._l2_down_until = time.monotonic() + L2_RETRY_S
+            logger.warning("Shared cache unavailable (%s); retrying in %.0fs", exc, L2_RETRY_S)
+            return None
+
+    def get(self, kind, key):
+        full_key = f"{KEY_PREFIX}:{kind}:{key}"
+        value = self.l1.get(full_key)
+        if value is not None:
+            self.stats["l1_hits"] += 1
+            return value
+        raw = self._l2_call(lambda: self.l2.get(full_key))
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+        value = json.loads(raw)
+        self.l1.set(full_key, value, L1_MAX_TTL_S.get(kind, L1_REFILL_TTL_S))
+        self.stats["l2_hits"] += 1
+        return value
+
+    def set(self, kind, key, value, ttl_s):
+        full_key = f"{KEY_PREFIX}:{kind}:{key}"
+        l1_ttl_s = min(ttl_s, L1_MAX_TTL_S.get(kind, ttl_s)) if self.l2 is not None else ttl_s
+        self.l1.set(full_key, value, l1_ttl_s)
+        self._l2_call(lambda: self.l2.set(full_key, json.dumps(value), ex=int(ttl_s)))
+
+    def delete(self, kind, key):
+        """Drop an entry from L1 and L2; other replicas' L1 copies expire within L1_MAX_TTL_S."""
+        full_key = f"{KEY_PREFIX}:{kind}:{key}"
+        self.l1.delete(full_key)
+        self._l2_call(lambda: self.l2.delete(full_key))
+
+# Process-wide tier shared by every Streamlit session
+cache = CacheTier(connect_l2())
+
+__all__ = ["CacheTier", "LRUCache", "connect_l2", "key_digest", "cache"]
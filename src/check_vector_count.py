@@ -1,11 +1,11 @@
-from langchain_community.embeddings import OllamaEmbeddings
 from langchain.vectorstores import Chroma
+from embedding_provider import get_embedding_provider
 
 # Path to the local DB where you stored the embeddings
 PERSIST_DIR = "chroma_db_empathy"
 
 # Reuse same embedding function
-embedding = OllamaEmbeddings(model="nomic-embed-text")
+embedding = get_embedding_provider()
 
 # Load existing vectorstore
 vectorstore = Chroma(
@@ -0,0 +1,104 @@
+import sys
+import datetime
+from collections import defaultdict
+
+import numpy as np
+
+from db import get_bot_db
+from rag_chain import embedding
+from feedback_counters import DOWNVOTE_THRESHOLD
+from pattern_learning import learn_question
+
+# === CONFIG ===
+SIMILARITY_THRESHOLD = 0.85   # cosine similarity for two questions to share a cluster
+CHUNK_ROWS = 1024             # rows of the similarity matrix computed at a time
+EMBED_BATCH = 250
+
+db = get_bot_db()
+counters = db["feedback_counters"]
+
+# === Load Downvoted Questions ===
+question_docs = list(counters.find({"scope": "question", "down": {"$gte": 1}}, {"question_key": 1, "question": 1, "down": 1}))
+if not question_docs:
+    print("✅ No downvoted questions to cluster.")
+    sys.exit(0)
+
+keys = [doc["question_key"] for doc in question_docs]
+position = {key: i for i, key in enumerate(keys)}
+user_down = defaultdict(lambda: defaultdict(int))   # row -> user -> 👎 count
+for doc in counters.find({"scope": "user", "down": {"$gte": 1}}, {"question_key": 1, "user": 1, "down": 1}):
+    if doc["question_key"] in position:
+        user_down[position[doc["question_key"]]][doc["user"]] += doc["down"]
+
+print(f"🔍 Downvoted questions: {len(keys)}")
+
+# === Embed ===
+texts = [doc.get("question") or doc["question_key"] for doc in question_docs]
+vectors = []
+for i in range(0, len(texts), EMBED_BATCH):
+    vectors.extend(embedding.embed_documents(texts[i:i + EMBED_BATCH]))
+vectors = np.asarray(vectors, dtype=np.float32)
+vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+# === Cluster: vectorized neighbour pass + union-find over similar pairs ===
+parent = np.arange(len(keys))
+
+def find(i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+for start in range(0, len(keys), CHUNK_ROWS):
+    sims = vectors[start:start + CHUNK_ROWS] @ vectors.T
+    rows, cols = np.nonzero(sims >= SIMILARITY_THRESHOLD)
+    for r, c in zip(rows + start, cols):
+        if c > r:
+            root_r, root_c = find(r), find(c)
+            if root_r != root_c:
+                parent[root_c] = root_r
+
+members_of = defaultdict(list)
+for i in range(len(keys)):
+    members_of[find(i)].append(i)
+print(f"🧩 Clusters: {len(members_of)}")
+
+# === Store Centroids ===
+build_id = datetime.datetime.utcnow()
+clusters = []
+for members in members_of.values():
+    centroid = vectors[members].mean(axis=0)
+    centroid /= np.linalg.norm(centroid)
+    per_user = defaultdict(int)
+    for m in members:
+        for user, down in user_down[m].items():
+            per_user[user] += down
+    representative = max(members, key=lambda m: question_docs[m]["down"])
+    clusters.append({
+        "centroid": centroid.tolist(),
+        "representative": texts[representative],
+        "member_keys": [keys[m] for m in members],
+        "member_questions": [texts[m] for m in members],
+        "total_down": int(sum(question_docs[m]["down"] for m in members)),
+        # List rather than a dict keyed by username: usernames may contain '.' or '$'
+        "user_downvotes": [{"user": user, "down": down} for user, down in per_user.items()],
+        "build_id": build_id,
+    })
+
+# Publish before pruning: readers follow the meta build_id, so the old build must outlive the switch
+db["downvote_clusters"].insert_many(clusters)
+db["downvote_clusters_meta"].update_one({"_id": "current"}, {"$set": {"build_id": build_id}}, upsert=True)
+db["downvote_clusters"].delete_many({"build_id": {"$ne": build_id}})
+
+# === Collapse Near-Duplicate Learning Patterns ===
+learned = 0
+for cluster in clusters:
+    if cluster["total_down"] < DOWNVOTE_THRESHOLD:
+        continue
+    learn_question(db, cluster["representative"])
+    duplicates = [q for q in cluster["member_questions"] if q != cluster["representative"]]
+    if duplicates:
+        db["blocked_patterns"].delete_many({"question_pattern": {"$in": duplicates}})
+    learned += 1
+
+print(f"🎉 Stored {len(clusters)} cluster centroids; {learned} cluster-level learning patterns.")
@@ -0,0 +1,62 @@
+"""Choosing which retrieved passages go into the prompt.
+
+Both stores are over-fetched, then the candidates are merged into one
+pool and near-duplicates are dropped using the vectors returned with the
+hits (no re-embedding). The final set is picked with maximal marginal
+relevance (MMR) until the token budget is spent, so a second passage only
+makes it in if it adds something the first did not already say.
+"""
+import numpy as np
+from langchain.schema import Document
+
+# === CONFIG ===
+CONTEXT_TOKEN_BUDGET = 600
+CHARS_PER_TOKEN = 4          # same rough estimate as the journal context
+DUPLICATE_SIMILARITY = 0.95  # cosine; candidates this close to a better hit are dropped
+MMR_LAMBDA = 0.7             # 1.0 = pure relevance, 0.0 = pure novelty
+MAX_CONTEXT_DOCS = 4
+MIN_USEFUL_CHARS = 200       # stop adding passages once less budget than this is left
+
+def _unit_rows(vectors):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+def assemble_context(query_vector, candidates, token_budget=CONTEXT_TOKEN_BUDGET, max_docs=MAX_CONTEXT_DOCS,
+                     mmr_lambda=MMR_LAMBDA):
+    """Pick context Documents from (Document, distance, vector) candidates of any store.
+
+    Returns the chosen Documents in selection order (most relevant first).
+    """
+    if not candidates:
+        return []
+    docs = [doc for doc, _, _ in candidates]
+    vectors = _unit_rows([vector for _, _, vector in candidates])
+    query = np.asarray(query_vector, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1.0
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+
+    # Best-first, drop anything nearly identical to a passage already kept
+    kept = []
+    for i in np.argsort(-relevance):
+        if all(similarity[i, j] < DUPLICATE_SIMILARITY for j in kept):
+            kept.append(int(i))
+
+    chosen, remaining_chars = [], token_budget * CHARS_PER_TOKEN
+    pool = list(kept)
+    while pool and len(chosen) < max_docs and remaining_chars >= MIN_USEFUL_CHARS:
+        def mmr(i):
+            redundancy = max((similarity[i, j] for j in chosen), default=0.0)
+            return mmr_lambda * relevance[i] - (1 - mmr_lambda) * redundancy
+        best = max(pool, key=mmr)
+        pool.remove(best)
+        chosen.append(best)
+        text = docs[best].page_content
+        if len(text) > remaining_chars:
+            text = text[:remaining_chars].rsplit(" ", 1)[0] + "…"
+            docs[best] = Document(page_content=text, metadata=docs[best].metadata)
+        remaining_chars -= len(text)
+    return [docs[i] for i in chosen]
+
+__all__ = ["assemble_context", "CONTEXT_TOKEN_BUDGET"]
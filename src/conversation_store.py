@@ -0,0 +1,48 @@
+"""Server-side chat history, one small document per message.
+
+Messages are keyed by (user, _id); ObjectIds are time-ordered, so the
+newest window and older pages are both single indexed range queries.
+The session only ever holds a bounded window, and older turns are
+fetched page by page when the user asks for them.
+"""
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from session_records import Message
+
+# === CONFIG ===
+WINDOW_SIZE = 30   # messages kept in st.session_state
+PAGE_SIZE = 20     # messages per "load earlier" page
+
+def ensure_conversation_indexes(db):
+    db["conversations"].create_index([("user", ASCENDING), ("_id", DESCENDING)])
+
+def _to_message(doc):
+    return Message(doc["role"], doc["content"], doc["time"], id=str(doc["_id"]))
+
+def append_messages(db, user_id, messages):
+    """Persist new messages in one round trip and tag each with its id."""
+    if not messages:
+        return
+    docs = [{"user": user_id, "role": m.role, "content": m.content, "time": m.time} for m in messages]
+    db["conversations"].insert_many(docs)
+    for message, doc in zip(messages, docs):
+        message.id = str(doc["_id"])
+
+def load_page(db, user_id, before_id=None, limit=PAGE_SIZE):
+    """Return (messages oldest-first, has_more) for up to `limit` messages before `before_id`."""
+    query = {"user": user_id}
+    if before_id:
+        query["_id"] = {"$lt": ObjectId(before_id)}
+    docs = list(
+        db["conversations"].find(query, {"role": 1, "content": 1, "time": 1})
+        .sort("_id", DESCENDING)
+        .limit(limit + 1)
+    )
+    has_more = len(docs) > limit
+    return [_to_message(doc) for doc in reversed(docs[:limit])], has_more
+
+def load_recent(db, user_id, limit=WINDOW_SIZE):
+    return load_page(db, user_id, None, limit)
+
+__all__ = ["WINDOW_SIZE", "PAGE_SIZE", "ensure_conversation_indexes", "append_messages", "load_page", "load_recent"]
@@ -0,0 +1,4 @@
+CRISIS_KEYWORDS = ["suicide", "kill myself", "self harm", "end my life", "want to die", "hurting myself", "cutting", "hopeless", "no reason to live"]
+
+def check_crisis(text):
+    return any(keyword in text.lower() for keyword in CRISIS_KEYWORDS)
@@ -0,0 +1,111 @@
+"""Shared MongoDB access for the Streamlit pages and background jobs.
+
+Streamlit re-executes page scripts on every rerun but imports this module
+only once per process, so the pooled client below is created once and
+reused by every session. Settings come from the environment:
+
+    MONGO_URI, MONGO_MAX_POOL_SIZE, MONGO_TIMEOUT_MS,
+    MONGO_READ_PREFERENCE, APP_DB_NAME, BOT_DB_NAME
+
+Indexes are meant to be built by a deploy step (`python src/db.py`). The
+pages still try once per process, but a failure there (Mongo down,
+duplicate usernames blocking the unique index) is logged and retried
+later instead of breaking the page that asked for a database.
+"""
+import logging
+import os
+import threading
+import time
+
+from pymongo import ASCENDING, MongoClient, ReadPreference
+from pymongo.errors import PyMongoError
+
+from feedback_counters import ensure_feedback_indexes
+from conversation_store import ensure_conversation_indexes
+
+# === CONFIG ===
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
+MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "50"))
+TIMEOUT_MS = int(os.environ.get("MONGO_TIMEOUT_MS", "5000"))
+# Secondary reads can lag behind the write a session just made (history, summaries); opt in explicitly
+READ_PREFERENCE = os.environ.get("MONGO_READ_PREFERENCE", "primary")
+APP_DB_NAME = os.environ.get("APP_DB_NAME", "mental_health_app")   # accounts
+BOT_DB_NAME = os.environ.get("BOT_DB_NAME", "mental_health_bot")   # summaries, feedback, patterns
+INDEX_RETRY_S = 60.0
+
+logger = logging.getLogger(__name__)
+
+_READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+_client = None
+_indexes_ready = False
+_indexes_retry_at = 0.0
+_lock = threading.Lock()
+
+def set_client(client):
+    """Swap in another client (e.g. an in-process stand-in for load tests)."""
+    global _client, _indexes_ready, _indexes_retry_at
+    with _lock:
+        _client = client
+        _indexes_ready = False
+        _indexes_retry_at = 0.0
+
+def get_client():
+    global _client
+    with _lock:
+        if _client is None:
+            _client = MongoClient(
+                MONGO_URI,
+                maxPoolSize=MAX_POOL_SIZE,
+                connectTimeoutMS=TIMEOUT_MS,
+                serverSelectionTimeoutMS=TIMEOUT_MS,
+                socketTimeoutMS=TIMEOUT_MS * 6,
+                waitQueueTimeoutMS=TIMEOUT_MS,
+                retryWrites=True,
+            )
+        return _client
+
+def _database(name):
+    read_preference = _READ_PREFERENCES.get(READ_PREFERENCE, ReadPreference.PRIMARY)
+    return get_client().get_database(name, read_preference=read_preference)
+
+def ensure_indexes():
+    """Create every index the app relies on, once per process/client."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    _database(APP_DB_NAME)["users"].create_index([("username", ASCENDING)], unique=True)
+    ensure_feedback_indexes(_database(BOT_DB_NAME))
+    ensure_conversation_indexes(_database(BOT_DB_NAME))
+    _indexes_ready = True
+
+def _try_ensure_indexes():
+    """ensure_indexes for the request path: logs failures and backs off instead of raising."""
+    global _indexes_retry_at
+    if _indexes_ready or time.monotonic() < _indexes_retry_at:
+        return
+    try:
+        ensure_indexes()
+    except PyMongoError as exc:
+        _indexes_retry_at = time.monotonic() + INDEX_RETRY_S
+        logger.warning("Could not create MongoDB indexes (%s); retrying in %.0fs", exc, INDEX_RETRY_S)
+
+def get_app_db():
+    _try_ensure_indexes()
+    return _database(APP_DB_NAME)
+
+def get_bot_db():
+    _try_ensure_indexes()
+    return _database(BOT_DB_NAME)
+
+__all__ = ["set_client", "get_client", "ensure_indexes", "get_app_db", "get_bot_db"]
+
+if __name__ == "__main__":
+    ensure_indexes()
+    print(f"✅ Indexes ready in {APP_DB_NAME} and {BOT_DB_NAME}")
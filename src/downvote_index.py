@@ -0,0 +1,70 @@
+"""In-memory index over downvoted-question cluster centroids.
+
+cluster_downvoted.py groups paraphrases of downvoted questions and stores
+one centroid per cluster. At runtime a question is matched to its nearest
+centroid with one matrix-vector product, so paraphrases share a single
+👎 tally instead of each needing ten votes on the exact same string.
+"""
+import threading
+import time
+
+import numpy as np
+
+from feedback_counters import DOWNVOTE_THRESHOLD
+
+# === CONFIG ===
+MATCH_SIMILARITY = 0.85
+REFRESH_INTERVAL_S = 60.0
+
+class DownvoteIndex:
+    def __init__(self, db, refresh_interval=REFRESH_INTERVAL_S):
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+        self._clusters = []
+        self._build_id = None
+        self._next_check = 0.0
+
+    def refresh(self, force=False):
+        """Reload centroids when the offline job has published a new build."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + self.refresh_interval
+        meta = self.db["downvote_clusters_meta"].find_one({"_id": "current"}) or {}
+        build_id = meta.get("build_id")
+        if build_id is None or build_id == self._build_id:
+            return
+        docs = list(self.db["downvote_clusters"].find({"build_id": build_id}, {"centroid": 1, "representative": 1, "user_downvotes": 1}))
+        clusters = [
+            {
+                "representative": doc["representative"],
+                "user_downvotes": {entry["user"]: entry["down"] for entry in doc.get("user_downvotes", [])},
+            }
+            for doc in docs
+        ]
+        centroids = np.asarray([doc["centroid"] for doc in docs], dtype=np.float32) if docs else np.zeros((0, 0), dtype=np.float32)
+        with self._lock:
+            self._centroids, self._clusters, self._build_id = centroids, clusters, build_id
+
+    def nearest(self, query_vector):
+        """Return (cluster, similarity) for the closest centroid above the threshold, else (None, 0.0)."""
+        self.refresh()
+        with self._lock:
+            centroids, clusters = self._centroids, self._clusters
+        if not clusters:
+            return None, 0.0
+        vec = np.asarray(query_vector, dtype=np.float32)
+        vec /= np.linalg.norm(vec) or 1.0
+        sims = centroids @ vec
+        best = int(np.argmax(sims))
+        if sims[best] < MATCH_SIMILARITY:
+            return None, float(sims[best])
+        return clusters[best], float(sims[best])
+
+    def is_blocked(self, user_id, query_vector):
+        cluster, _ = self.nearest(query_vector)
+        return bool(cluster) and cluster["user_downvotes"].get(user_id, 0) >= DOWNVOTE_THRESHOLD
+
+__all__ = ["DownvoteIndex"]
@@ -1,9 +1,10 @@
-from langchain_community.embeddings import OllamaEmbeddings
 from langchain.vectorstores import Chroma
+from embedding_provider import get_embedding_provider
+from store_meta import check_embedding_version, mark_ingest
 from langchain.schema import Document
 
 # Create embedding model (use the one you pulled via Ollama)
-embedding = OllamaEmbeddings(model="nomic-embed-text")
+embedding = get_embedding_provider()
 
 # Sample text documents (like coping strategies)
 docs = [
@@ -13,5 +14,7 @@ docs = [
 ]
 
 # Create a Chroma vector store and persist it locally
+check_embedding_version("chroma_db", embedding)
 vectorstore = Chroma.from_documents(documents=docs, embedding=embedding, persist_directory="chroma_db")
+mark_ingest("chroma_db")
 print("✅ Documents embedded and stored!")
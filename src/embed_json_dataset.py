@@ -1,8 +1,8 @@
 import json
 from pathlib import Path
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain.vectorstores import Chroma
 from langchain.schema import Document
+from embedding_provider import get_embedding_provider
+from store_meta import mark_ingest, open_chroma
 
 # === CONFIG ===
 INPUT_PATH = Path("data\empathetic_dialogues_prepared.jsonl")
@@ -26,12 +26,9 @@ with INPUT_PATH.open("r", encoding="utf-8") as f:
 print(f"🔍 Total documents: {len(raw_lines)}")
 
 # === Setup Embedding and Vector DB ===
-embedding = OllamaEmbeddings(model="nomic-embed-text")
+embedding = get_embedding_provider()  # one /api/embed request per 64 texts
 
-vectorstore = Chroma(
-    persist_directory=PERSIST_DIR,
-    embedding_function=embedding
-)
+vectorstore = open_chroma(PERSIST_DIR, embedding)   # refuses a store embedded with another provider
 
 start_idx = get_last_index()
 print(f"⏩ Resuming from index {start_idx}...")
@@ -51,6 +48,7 @@ for i in range(start_idx, len(raw_lines), BATCH_SIZE):
     print(f"🔄 Embedding docs {i} → {i + len(documents)}...")
     vectorstore.add_documents(documents)
     vectorstore.persist()
+    mark_ingest(PERSIST_DIR)   # new content version, so cached retrievals for this store are not reused
 
     save_progress(i + len(documents))
     print(f"✅ Batch {i // BATCH_SIZE + 1} complete.")
@@ -0,0 +1,165 @@
+"""Embedding providers shared by retrieval and every ingest script.
+
+These backends implement LangChain's `Embeddings` interface, so any of them
+can be handed to Chroma:
+
+    ollama         true multi-input requests to Ollama's /api/embed,
+                   BATCH_SIZE texts per call, over keep-alive sessions and
+                   the embed pool; vectors are unit length
+    ollama-legacy  the old one-text-per-request /api/embeddings, whose
+                   vectors are not normalised; for serving stores built
+                   with it until they are re-embedded
+    hashing        deterministic feature hashing of words and word pairs;
+                   no model or network, for benchmarks and CI
+
+EMBEDDING_PROVIDER picks the backend and EMBEDDING_MODEL the Ollama model.
+The default, "auto", follows the stamp on the app's main stores (AUTO_STORES):
+ollama-legacy while they are unstamped, as shipped, and batched ollama once
+reembed_store.py has re-embedded them (or for a fresh checkout without
+stores), so the app starts without any manual step. Each embedder has a `version`
+("<provider>:<model>:<unit|raw>"); vectors from different versions are not
+comparable, and store_meta.py refuses to open a store built with another one.
+"""
+import hashlib
+import math
+import os
+import re
+import threading
+
+import requests
+from langchain.embeddings.base import Embeddings
+from requests.adapters import HTTPAdapter
+
+from ollama_pool import embed_pool
+from store_meta import EmbeddingVersionMismatch, stored_embedding_version
+
+# === CONFIG ===
+PROVIDER = os.environ.get("EMBEDDING_PROVIDER", "auto")
+AUTO_STORES = ("chroma_db", "chroma_db_empathy")   # the stores every query vector is searched against
+MODEL = os.environ.get("EMBEDDING_MODEL", "nomic-embed-text")
+BATCH_SIZE = 64              # texts per /api/embed request
+REQUEST_TIMEOUT_S = 120.0
+HTTP_POOL_SIZE = 32          # keep-alive connections per endpoint
+HASHING_DIM = 768            # same width as nomic-embed-text
+
+class OllamaBatchEmbeddings(Embeddings):
+    """Batched /api/embed calls spread over an endpoint pool."""
+
+    def __init__(self, pool, model=MODEL, batch_size=BATCH_SIZE):
+        self.pool = pool
+        self.model = model
+        self.version = f"ollama:{model}:unit"
+        self.batch_size = batch_size
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _session(self, url):
+        with self._lock:
+            if url not in self._sessions:
+                session = requests.Session()
+                session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE))
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE))
+                self._sessions[url] = session
+            return self._sessions[url]
+
+    def _embed_batch(self, texts):
+        def call(url):
+            response = self._session(url).post(
+                f"{url}/api/embed", json={"model": self.model, "input": texts}, timeout=REQUEST_TIMEOUT_S
+            )
+            response.raise_for_status()
+            embeddings = response.json()["embeddings"]
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} texts")
+            return embeddings
+        return self.pool.call(call)
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[i:i + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed_batch([text])[0]
+
+class OllamaLegacyEmbeddings(OllamaBatchEmbeddings):
+    """The pre-batching /api/embeddings calls, one text per request and unnormalised vectors."""
+
+    def __init__(self, pool, model=MODEL, batch_size=BATCH_SIZE):
+        super().__init__(pool, model=model, batch_size=batch_size)
+        self.version = f"ollama:{model}:raw"
+
+    def _embed_batch(self, texts):
+        def call(url):
+            session = self._session(url)
+            embeddings = []
+            for text in texts:
+                response = session.post(
+                    f"{url}/api/embeddings", json={"model": self.model, "prompt": text}, timeout=REQUEST_TIMEOUT_S
+                )
+                response.raise_for_status()
+                embeddings.append(response.json()["embedding"])
+            return embeddings
+        return self.pool.call(call)
+
+class HashingEmbeddings(Embeddings):
+    """Signed feature hashing of words and adjacent word pairs, L2-normalised.
+
+    Texts sharing vocabulary get similar vectors, which is enough for
+    retrieval to behave plausibly in benchmarks without a model.
+    """
+
+    def __init__(self, dim=HASHING_DIM):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+        self.version = f"hashing:{self.model}:unit"
+
+    def _features(self, text):
+        words = re.findall(r"[a-z0-9']+", text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_query(self, text):
+        vector = [0.0] * self.dim
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+def provider_for_stores(persist_directories=AUTO_STORES):
+    """The provider name matching how the given stores were embedded ("ollama" when none exist yet)."""
+    persist_directories = [str(directory) for directory in persist_directories]
+    versions = {v for v in map(stored_embedding_version, persist_directories) if v is not None}
+    if len(versions) > 1:
+        raise EmbeddingVersionMismatch(
+            f"{', '.join(persist_directories)} were embedded differently ({', '.join(sorted(versions))}); "
+            f"re-embed them with `python src/reembed_store.py {' '.join(persist_directories)}`"
+        )
+    if not versions:
+        return "ollama"
+    provider, _, normalisation = versions.pop().rpartition(":")
+    if provider.startswith("hashing:"):
+        return "hashing"
+    return "ollama" if normalisation == "unit" else "ollama-legacy"
+
+def get_embedding_provider(name=PROVIDER, model=MODEL):
+    if name == "auto":
+        name = provider_for_stores()
+    if name == "ollama":
+        return OllamaBatchEmbeddings(embed_pool, model=model)
+    if name == "ollama-legacy":
+        return OllamaLegacyEmbeddings(embed_pool, model=model)
+    if name == "hashing":
+        return HashingEmbeddings()
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER {name!r} (expected 'ollama', 'ollama-legacy' or 'hashing')")
+
+__all__ = [
+    "OllamaBatchEmbeddings", "OllamaLegacyEmbeddings", "HashingEmbeddings", "provider_for_stores",
+    "get_embedding_provider",
+]
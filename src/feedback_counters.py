@@ -0,0 +1,69 @@
+"""Pre-aggregated 👍/👎 counters so feedback checks are single indexed lookups.
+
+`feedback_counters` holds one document per (user, normalized question) with
+scope "user" and one per normalized question with scope "question"
+(user=None). Both are maintained with atomic $inc upserts from the
+feedback writer's batches; the raw `feedback` collection stays the source
+of truth and can be replayed with backfill_feedback_counters.py.
+"""
+from collections import Counter
+
+from pymongo import ASCENDING, UpdateOne
+
+# === CONFIG ===
+DOWNVOTE_THRESHOLD = 10
+COUNTER_FIELDS = {"👍": "up", "👎": "down"}
+
+def normalize_question(question):
+    return " ".join(question.lower().split())
+
+def ensure_feedback_indexes(db):
+    """Create the indexes the feedback paths rely on; safe to call on every startup."""
+    db["feedback_counters"].create_index(
+        [("scope", ASCENDING), ("question_key", ASCENDING), ("user", ASCENDING)], unique=True
+    )
+    db["feedback"].create_index([("question", ASCENDING), ("feedback", ASCENDING)])
+    db["feedback"].create_index([("user", ASCENDING), ("question", ASCENDING), ("feedback", ASCENDING)])
+    db["blocked_patterns"].create_index([("question_pattern", ASCENDING)], unique=True)
+    db["blocked_patterns"].create_index([("created_at", ASCENDING)])
+    db["user_summaries"].create_index([("user_id", ASCENDING)], unique=True)
+
+def counter_updates(events):
+    """Aggregate a batch of feedback events into $inc upserts for bulk_write."""
+    user_incs = Counter()
+    question_incs = Counter()
+    question_text = {}
+    for event in events:
+        key = normalize_question(event["question"])
+        field = COUNTER_FIELDS[event["feedback"]]
+        user_incs[(event["user"], key, field)] += 1
+        question_incs[(key, field)] += 1
+        question_text[key] = event["question"]
+    ops = [
+        UpdateOne({"scope": "user", "question_key": key, "user": user}, {"$inc": {field: count}}, upsert=True)
+        for (user, key, field), count in user_incs.items()
+    ]
+    ops += [
+        UpdateOne(
+            {"scope": "question", "question_key": key, "user": None},
+            {"$inc": {field: count}, "$set": {"question": question_text[key]}},
+            upsert=True,
+        )
+        for (key, field), count in question_incs.items()
+    ]
+    return ops
+
+def user_downvotes(db, user_id, question):
+    doc = db["feedback_counters"].find_one(
+        {"scope": "user", "question_key": normalize_question(question), "user": user_id},
+        {"down": 1},
+    )
+    return (doc or {}).get("down", 0)
+
+def is_question_blocked(db, user_id, question):
+    return user_downvotes(db, user_id, question) >= DOWNVOTE_THRESHOLD
+
+__all__ = [
+    "DOWNVOTE_THRESHOLD", "normalize_question", "ensure_feedback_indexes",
+    "counter_updates", "user_downvotes", "is_question_blocked",
+]
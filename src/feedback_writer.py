@@ -0,0 +1,199 @@
+"""Write-behind buffer for 👍/👎 feedback events.
+
+Clicks only enqueue an event. A background thread flushes the queue with
+insert_many once BATCH_SIZE events are waiting or FLUSH_INTERVAL_S has
+passed, then applies the counter increments in one bulk_write and runs the
+`after_flush` hooks (pattern learning, guidance refresh) in the order they
+were added. If Mongo is unreachable the batch is
+appended to a JSONL spill file and replayed before the next successful
+flush. Each event gets its `_id` when it is submitted and keeps it in the
+spill, so replaying a batch that partly reached Mongo before a timeout or a
+bulk write error does not insert the stored events twice. Spilled events
+were never counted (counting only follows a successful insert), so on
+replay a duplicate key means "stored, not yet counted" and the event is
+counted and learned from then. Pending events are flushed at interpreter
+exit.
+"""
+import atexit
+import datetime
+import json
+import logging
+import queue
+import threading
+from pathlib import Path
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from feedback_counters import counter_updates
+
+# === CONFIG ===
+BATCH_SIZE = 100
+FLUSH_INTERVAL_S = 2.0
+SPILL_PATH = Path("feedback_spill.jsonl")
+DUPLICATE_KEY = 11000
+
+logger = logging.getLogger(__name__)
+
+def _to_json(event):
+    return json.dumps(
+        {**event, "_id": str(event["_id"]), "timestamp": event["timestamp"].isoformat()}, ensure_ascii=False
+    )
+
+def _from_json(line):
+    event = json.loads(line)
+    event["_id"] = ObjectId(event["_id"])
+    event["timestamp"] = datetime.datetime.fromisoformat(event["timestamp"])
+    return event
+
+def _hook_name(hook):
+    return getattr(hook, "__module__", None), getattr(hook, "__qualname__", id(hook))
+
+class FeedbackWriter:
+    def __init__(self, db, after_flush=None, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL_S, spill_path=SPILL_PATH):
+        self.db = db
+        self.hooks = [after_flush] if after_flush else []
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path)
+        self._queue = queue.Queue()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add_hook(self, after_flush):
+        """Run `after_flush(db, events)` after every flush.
+
+        A hook with the same module and name as one already added (the same
+        function, or its re-definition on a Streamlit rerun) replaces it in
+        place, so pages can register on every run without piling up hooks.
+        """
+        name = _hook_name(after_flush)
+        with self._flush_lock:
+            for i, hook in enumerate(self.hooks):
+                if _hook_name(hook) == name:
+                    self.hooks[i] = after_flush
+                    return
+            self.hooks.append(after_flush)
+
+    def submit(self, user_id, question, response, feedback):
+        """Queue one feedback event; never touches the database."""
+        self._queue.put({
+            "_id": ObjectId(), "user": user_id, "question": question, "response": response,
+            "feedback": feedback, "timestamp": datetime.datetime.utcnow()
+        })
+
+    def _drain(self, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                first = None
+            # Give a burst of clicks a moment to accumulate into one batch
+            if first is not None and self._queue.qsize() < self.batch_size:
+                self._stopped.wait(self.flush_interval)
+            try:
+                self.flush(self._drain(first))
+            except Exception:
+                # Keep the writer alive whatever a flush, its spill or the hook raises
+                logger.exception("Feedback flush failed")
+
+    def _insert(self, batch, replayed=0):
+        """Insert `batch`; returns (events to count now, events to spill and retry).
+
+        The first `replayed` events come from the spill. A duplicate key among
+        them means an interrupted flush stored the event without counting it,
+        so it is counted now; any other duplicate was already counted.
+        """
+        try:
+            self.db["feedback"].insert_many(batch, ordered=False)
+            return batch, []
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors", [])
+            skip = {
+                error["index"] for error in errors
+                if error.get("code") != DUPLICATE_KEY or error["index"] >= replayed
+            }
+            retry = {error["index"] for error in errors if error.get("code") != DUPLICATE_KEY}
+            written = [event for i, event in enumerate(batch) if i not in skip]
+            return written, [batch[i] for i in sorted(retry)]
+
+    def flush(self, batch=None):
+        """Write `batch` (or everything queued) plus any spilled events."""
+        batch = self._drain() if batch is None else batch
+        with self._flush_lock:
+            spilled = self._read_spill()
+            batch = spilled + batch
+            if not batch:
+                return
+            try:
+                written, retry = self._insert(batch, replayed=len(spilled))
+            except PyMongoError as exc:
+                logger.warning("Feedback flush failed, spilling %d events to disk: %s", len(batch), exc)
+                self._write_spill(batch)
+                return
+            if retry:
+                logger.warning("%d feedback events were rejected, spilling them to disk", len(retry))
+                self._write_spill(retry)
+            else:
+                self.spill_path.unlink(missing_ok=True)
+            if not written:
+                return
+            # Raw events are safe at this point; counters can be repaired with the backfill job
+            try:
+                self.db["feedback_counters"].bulk_write(counter_updates(written), ordered=False)
+            except PyMongoError as exc:
+                logger.warning("Feedback counters update failed: %s", exc)
+            for hook in list(self.hooks):
+                try:
+                    hook(self.db, written)
+                except Exception as exc:
+                    logger.warning("Feedback hook %s failed: %s", getattr(hook, "__name__", hook), exc)
+
+    def _read_spill(self):
+        if not self.spill_path.exists():
+            return []
+        with self.spill_path.open(encoding="utf-8") as f:
+            return [_from_json(line) for line in f if line.strip()]
+
+    def _write_spill(self, batch):
+        # Rewrite rather than append: `batch` already includes the previously spilled events
+        tmp_path = self.spill_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for event in batch:
+                f.write(_to_json(event) + "\n")
+        tmp_path.replace(self.spill_path)
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_feedback_writer(db, after_flush=None):
+    """Process-wide writer shared by every page and session; each page's hook is added once."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = FeedbackWriter(db)
+    if after_flush:
+        _writer.add_hook(after_flush)
+    return _writer
+
+__all__ = ["FeedbackWriter", "get_feedback_writer"]
@@ -0,0 +1,122 @@
+"""Process-wide inverted index over learned `blocked_patterns`.
+
+Instead of reading the whole collection and substring-testing every word of
+every pattern on each message, patterns are tokenised once into
+token -> pattern postings. The index refreshes incrementally using the
+patterns' `created_at` stamp (rewritten on every upsert; patterns sharing
+the last stamp seen are re-read and skipped by _id). Removals carry no
+stamp, so each refresh also reads the collection's _ids (served from the
+_id index) and drops patterns whose document is gone, e.g. the duplicates
+cluster_downvoted.py deletes while it learns their representative. Matches
+are ranked by IDF-weighted token overlap so only the most relevant guidance
+is injected into the prompt.
+"""
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+
+# === CONFIG ===
+REFRESH_INTERVAL_S = 30.0
+TOP_K = 3
+MIN_TOKEN_LEN = 3
+STOPWORDS = {
+    "the", "and", "for", "are", "but", "not", "you", "your", "with", "have", "has", "had",
+    "this", "that", "what", "when", "how", "why", "who", "was", "were", "can", "could",
+    "would", "should", "about", "from", "they", "them", "then", "than", "there", "just",
+    "feel", "feeling", "really", "very", "like", "get", "got", "im", "i'm", "its", "it's",
+    "been", "being", "into", "out", "all", "any", "some", "more", "much", "also", "don't", "dont",
+}
+
+def tokenize(text):
+    return {
+        token for token in re.findall(r"[a-z']+", text.lower())
+        if len(token) >= MIN_TOKEN_LEN and token not in STOPWORDS
+    }
+
+class GuidanceIndex:
+    def __init__(self, collection, refresh_interval=REFRESH_INTERVAL_S):
+        self.collection = collection
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._postings = defaultdict(set)   # token -> question_pattern keys
+        self._patterns = {}                 # question_pattern -> {"tokens", "guidance", "example"}
+        self._ids = {}                      # question_pattern -> _id of the document it was indexed from
+        self._last_stamp = None
+        self._ids_at_stamp = set()          # _ids already indexed whose created_at == _last_stamp
+        self._next_check = 0.0
+
+    def _index(self, doc):
+        key = doc["question_pattern"]
+        self._unindex(key)
+        self._ids[key] = doc["_id"]
+        tokens = tokenize(key)
+        examples = doc.get("bad_response_examples") or [""]
+        self._patterns[key] = {"tokens": tokens, "guidance": doc.get("guidance", ""), "example": examples[0]}
+        for token in tokens:
+            self._postings[token].add(key)
+
+    def _unindex(self, key):
+        self._ids.pop(key, None)
+        old = self._patterns.pop(key, None)
+        if old:
+            for token in old["tokens"]:
+                self._postings[token].discard(key)
+                if not self._postings[token]:
+                    del self._postings[token]
+
+    def refresh(self, force=False):
+        """Drop patterns whose document was removed, then pull patterns changed since the last stamp."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + self.refresh_interval
+
+        projection = {"question_pattern": 1, "guidance": 1, "bad_response_examples": {"$slice": 1}, "created_at": 1}
+        with self._lock:
+            if self._ids:
+                live_ids = {doc["_id"] for doc in self.collection.find({}, {"_id": 1})}
+                for key in [key for key, _id in self._ids.items() if _id not in live_ids]:
+                    self._unindex(key)
+            # $gte: a pattern written in the same instant as the last one read must not be missed
+            query = {"created_at": {"$gte": self._last_stamp}} if self._last_stamp else {}
+            for doc in self.collection.find(query, projection):
+                stamp = doc.get("created_at")
+                if stamp == self._last_stamp and doc["_id"] in self._ids_at_stamp:
+                    continue
+                self._index(doc)
+                if stamp and (self._last_stamp is None or stamp > self._last_stamp):
+                    self._last_stamp = stamp
+                    self._ids_at_stamp = set()
+                if stamp and stamp == self._last_stamp:
+                    self._ids_at_stamp.add(doc["_id"])
+
+    def request_refresh(self):
+        """Make the next match re-read changed patterns, e.g. right after learning."""
+        self._next_check = 0.0
+
+    def match(self, question, top_k=TOP_K):
+        """Return up to `top_k` pattern entries ranked by IDF-weighted token overlap."""
+        self.refresh()
+        tokens = tokenize(question)
+        with self._lock:
+            total = len(self._patterns) or 1
+            scores = defaultdict(float)
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings:
+                    idf = math.log(1 + total / len(postings))
+                    for key in postings:
+                        scores[key] += idf
+            ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+            return [self._patterns[key] for key in ranked]
+
+    def guidance_for(self, question, top_k=TOP_K):
+        guidance = ""
+        for pattern in self.match(question, top_k):
+            guidance += f"\n⚠️ Guidance: {pattern['guidance']}\n"
+            guidance += f"❌ Avoid responses like: {pattern['example'][:100]}...\n"
+        return guidance
+
+__all__ = ["GuidanceIndex", "tokenize"]
@@ -1,9 +1,8 @@
 import streamlit as st
-from pymongo import MongoClient
 import hashlib
+from db import get_app_db
 
-client = MongoClient("mongodb://localhost:27017/")
-db = client["mental_health_app"]
+db = get_app_db()  # pooled process-wide client shared with the chat pages
 users_collection = db["users"]
 
 def hash_password(password):
@@ -0,0 +1,96 @@
+"""Incremental semantic search over each user's journal.
+
+Entries are embedded in the background into a per-user Chroma collection
+(chroma_db_journal) using the same nomic-embed-text setup as retrieval.
+Progress is a byte offset into the user's entries.log, saved next to the
+journal like embedding_progress.txt is for the datasets, so each run only
+embeds entries appended since the last one. Nothing ever needs a full
+re-embed.
+"""
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.schema import Document
+
+from rag_chain import embedding
+from journal_store import user_dir, read_since, log_size
+from store_meta import open_chroma
+
+# === CONFIG ===
+PERSIST_DIR = "chroma_db_journal"
+EMBED_BATCH = 64
+CHARS_PER_TOKEN = 4   # rough estimate used for the prompt budget
+CONTEXT_MAX_DISTANCE = 0.5   # cosine distance; looser hits are not worth prompt tokens
+
+# One worker: indexing is background work and must not race on a user's progress file
+_indexer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal-index")
+_stores = {}
+_stores_lock = threading.Lock()
+
+def _store(user_id):
+    with _stores_lock:
+        if user_id not in _stores:
+            name = "journal_" + hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:16]
+            _stores[user_id] = open_chroma(
+                PERSIST_DIR, embedding, collection_name=name, collection_metadata={"hnsw:space": "cosine"}
+            )
+        return _stores[user_id]
+
+def _progress_file(user_id):
+    return user_dir(user_id) / "embedded_offset.txt"
+
+def get_embedded_offset(user_id):
+    path = _progress_file(user_id)
+    return int(path.read_text().strip()) if path.exists() else 0
+
+def index_new_entries(user_id):
+    """Embed entries appended since the last run; returns how many were added."""
+    offset = get_embedded_offset(user_id)
+    if offset >= log_size(user_id):
+        return 0
+    pending = read_since(user_id, offset)
+    store = _store(user_id)
+    for i in range(0, len(pending), EMBED_BATCH):
+        batch = pending[i:i + EMBED_BATCH]
+        texts = [entry["text"] for _, entry in batch]
+        # End offsets are stable IDs, so a retried batch overwrites instead of duplicating
+        store._collection.upsert(
+            ids=[str(end_offset) for end_offset, _ in batch],
+            embeddings=embedding.embed_documents(texts),
+            documents=texts,
+            metadatas=[{"date": entry["date"], "ts": entry["ts"]} for _, entry in batch],
+        )
+        _progress_file(user_id).write_text(str(batch[-1][0]))
+    return len(pending)
+
+def schedule_index(user_id):
+    """Queue background indexing for a user (after a save, or before searching)."""
+    return _indexer.submit(index_new_entries, user_id)
+
+def search_by_vector(user_id, query_vector, k=3):
+    """(Document, distance) pairs from the user's journal; empty until something is indexed."""
+    if get_embedded_offset(user_id) == 0:
+        return []
+    return _store(user_id).similarity_search_by_vector_with_relevance_scores(query_vector, k=k)
+
+def search_journal(user_id, query, k=5):
+    schedule_index(user_id)
+    return search_by_vector(user_id, embedding.embed_query(query), k)
+
+def journal_context(hits, token_budget=300):
+    """Turn journal hits into context Documents that fit in `token_budget` tokens."""
+    docs, remaining = [], token_budget * CHARS_PER_TOKEN
+    for doc, distance in hits:
+        if distance > CONTEXT_MAX_DISTANCE:
+            continue
+        text = f"From the user's journal ({doc.metadata.get('date', '')}): {doc.page_content}"
+        if len(text) > remaining:
+            if remaining < 200:
+                break
+            text = text[:remaining].rsplit(" ", 1)[0] + "…"
+        docs.append(Document(page_content=text, metadata=doc.metadata))
+        remaining -= len(text)
+    return docs
+
+__all__ = ["index_new_entries", "schedule_index", "search_by_vector", "search_journal", "journal_context"]
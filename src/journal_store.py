@@ -0,0 +1,151 @@
+"""Append-only, per-user journal store with a date/offset index.
+
+Each user gets a directory under journal_entries/ holding:
+
+    entries.log   one JSON record per entry, only ever appended to
+    index.tsv     "<date>\\t<offset>\\t<length>" per entry, also append-only
+
+The index is small and cached in memory (reloaded only when the file
+grows), so listing dates, paging and date-range queries seek straight to
+the entries they need instead of reading every day's file.
+
+    python src/journal_store.py --import-legacy USERNAME   # import old <date>.txt files
+"""
+import datetime
+import hashlib
+import json
+import re
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+# === CONFIG ===
+JOURNAL_DIR = Path("journal_entries")
+PAGE_SIZE = 10
+
+_lock = threading.Lock()
+_index_cache = {}   # user dir -> (index size in bytes, [(date, offset, length), ...])
+
+def user_dir(user_id):
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", user_id)[:40]
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:8]
+    return JOURNAL_DIR / f"{safe}-{digest}"
+
+def append_entry(user_id, text, when=None):
+    """Append one entry; returns its record. `when` defaults to now."""
+    when = when or datetime.datetime.now()
+    record = {"ts": when.isoformat(), "date": when.date().isoformat(), "text": text}
+    data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    directory = user_dir(user_id)
+    with _lock:
+        directory.mkdir(parents=True, exist_ok=True)
+        with (directory / "entries.log").open("ab") as f:
+            offset = f.seek(0, 2)
+            f.write(data)
+        with (directory / "index.tsv").open("a", encoding="utf-8") as f:
+            f.write(f"{record['date']}\t{offset}\t{len(data)}\n")
+    return record
+
+def _load_index(user_id):
+    index_path = user_dir(user_id) / "index.tsv"
+    if not index_path.exists():
+        return []
+    size = index_path.stat().st_size
+    cached = _index_cache.get(index_path)
+    if cached and cached[0] == size:
+        return cached[1]
+    rows = []
+    with index_path.open(encoding="utf-8") as f:
+        for line in f:
+            date, offset, length = line.rstrip("\n").split("\t")
+            rows.append((date, int(offset), int(length)))
+    # Entries are appended in time order, but imported history may not be
+    rows.sort(key=lambda row: (row[0], row[1]))
+    _index_cache[index_path] = (size, rows)
+    return rows
+
+def _read(user_id, rows):
+    if not rows:
+        return []
+    entries = []
+    with (user_dir(user_id) / "entries.log").open("rb") as f:
+        for _, offset, length in rows:
+            f.seek(offset)
+            entries.append(json.loads(f.read(length)))
+    return entries
+
+def count_entries(user_id):
+    return len(_load_index(user_id))
+
+def list_dates(user_id):
+    """Distinct entry dates, newest first."""
+    return sorted({row[0] for row in _load_index(user_id)}, reverse=True)
+
+def read_page(user_id, page=0, per_page=PAGE_SIZE):
+    """Entries newest-first for one page; only that page's records are read from disk."""
+    rows = _load_index(user_id)
+    end = len(rows) - page * per_page
+    return list(reversed(_read(user_id, rows[max(0, end - per_page):max(0, end)])))
+
+def _range(rows, start_date, end_date):
+    dates = [row[0] for row in rows]
+    return bisect_left(dates, str(start_date)), bisect_right(dates, str(end_date))
+
+def count_between(user_id, start_date, end_date):
+    """Number of entries with start_date <= date <= end_date, from the index alone."""
+    lo, hi = _range(_load_index(user_id), start_date, end_date)
+    return hi - lo
+
+def entries_between(user_id, start_date, end_date, latest=None):
+    """Entries with start_date <= date <= end_date (ISO strings or dates), oldest first.
+
+    With `latest`, only the newest `latest` of them are read from disk.
+    """
+    rows = _load_index(user_id)
+    lo, hi = _range(rows, start_date, end_date)
+    if latest is not None:
+        lo = max(lo, hi - latest)
+    return _read(user_id, rows[lo:hi])
+
+def read_since(user_id, offset):
+    """(end offset, entry) pairs for entries starting at or after a byte offset, in append order.
+
+    An entry's end offset is where the next one starts, so it doubles as a resume point.
+    """
+    rows = sorted((row for row in _load_index(user_id) if row[1] >= offset), key=lambda row: row[1])
+    return list(zip((row[1] + row[2] for row in rows), _read(user_id, rows)))
+
+def log_size(user_id):
+    path = user_dir(user_id) / "entries.log"
+    return path.stat().st_size if path.exists() else 0
+
+# The old page wrote "<isoformat timestamp>\n<text>\n\n" per entry. Entry text may itself contain
+# blank lines, so entries are split on the timestamp header rather than on "\n\n".
+_LEGACY_HEADER = re.compile(r"(?:^|\n\n)(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?)\n")
+
+def parse_legacy_file(path):
+    """(timestamp, text) pairs for the entries in one old <date>.txt file."""
+    parts = _LEGACY_HEADER.split(Path(path).read_text(encoding="utf-8"))
+    entries = []
+    if parts[0].strip():   # text before the first header has no timestamp of its own
+        entries.append((datetime.datetime.fromisoformat(Path(path).stem), parts[0].strip()))
+    for stamp, text in zip(parts[1::2], parts[2::2]):
+        if text.strip():
+            entries.append((datetime.datetime.fromisoformat(stamp), text.strip()))
+    return entries
+
+def import_legacy_files(user_id, legacy_dir=JOURNAL_DIR):
+    """Import the old shared journal_entries/<date>.txt files into a user's store."""
+    imported = 0
+    for path in sorted(Path(legacy_dir).glob("*.txt")):
+        for when, text in parse_legacy_file(path):
+            append_entry(user_id, text, when)
+            imported += 1
+    return imported
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--import-legacy":
+        print(f"✅ Imported {import_legacy_files(sys.argv[2])} legacy journal entries for {sys.argv[2]}.")
+    else:
+        print(__doc__)
@@ -0,0 +1,57 @@
+import datetime
+import streamlit as st
+
+from journal_store import PAGE_SIZE, append_entry, count_between, count_entries, entries_between, list_dates, read_page
+from journal_search import schedule_index, search_journal
+
+RANGE_LIMIT = 50  # entries rendered for one date-range query
+
+def render_journal(user_id):
+    """Journaling tab shared by the app pages: write, then browse by page or date range."""
+    st.header("📓 Daily Journal")
+    today = datetime.date.today().isoformat()
+    journal_text = st.text_area("Write about your day:", height=250)
+
+    if st.button("Save Journal Entry"):
+        if journal_text.strip():
+            append_entry(user_id, journal_text)
+            schedule_index(user_id)  # embedded in the background; saving never waits on Ollama
+            st.success(f"Journal saved for {today}.")
+        else:
+            st.warning("Please write something before saving.")
+
+    search_query = st.text_input("🔍 Search my journal", placeholder="e.g. times I felt calm")
+    if search_query.strip():
+        hits = search_journal(user_id, search_query)
+        if not hits:
+            st.info("No matching entries yet — new entries become searchable a few moments after saving.")
+        for doc, _ in hits:
+            st.subheader(f"{doc.metadata.get('date', '')} · {doc.metadata.get('ts', '')[11:16]}")
+            st.text(doc.page_content)
+
+    if st.checkbox("Show Previous Entries"):
+        total = count_entries(user_id)
+        if not total:
+            st.info("No journal entries found yet.")
+            return
+
+        dates = list_dates(user_id)
+        use_range = st.checkbox("Filter by date range")
+        if use_range:
+            picked = st.date_input(
+                "Dates", value=(datetime.date.fromisoformat(dates[-1]), datetime.date.fromisoformat(dates[0]))
+            )
+            # While the user is mid-selection Streamlit returns a single date
+            start, end = (picked[0], picked[-1]) if isinstance(picked, tuple) and picked else (picked, picked)
+            in_range = count_between(user_id, start.isoformat(), end.isoformat())
+            if in_range > RANGE_LIMIT:
+                st.caption(f"Showing the latest {RANGE_LIMIT} of {in_range} entries in this range.")
+            entries = list(reversed(entries_between(user_id, start.isoformat(), end.isoformat(), latest=RANGE_LIMIT)))
+        else:
+            pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+            page = st.number_input(f"Page (1–{pages})", min_value=1, max_value=pages, value=1) - 1
+            entries = read_page(user_id, page)
+
+        for entry in entries:
+            st.subheader(f"{entry['date']} · {entry['ts'][11:16]}")
+            st.text(entry["text"])
@@ -0,0 +1,130 @@
+"""Minimal stand-in for the shared cache service, speaking the Redis protocol.
+
+Supports PING, GET, SET (with EX/PX), DEL, EXISTS, DBSIZE and FLUSHDB,
+which is everything cache_tier.py needs, plus the HELLO handshake newer
+redis-py clients open each connection with, so replicas and tests can share a
+cache without a Redis install. Data lives in memory only.
+
+    python src/kv_standin.py --port 6390
+    CACHE_URL=redis://127.0.0.1:6390/0 streamlit run src/home.py
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+class KVStore:
+    def __init__(self):
+        self._data = {}   # key -> (value bytes, expires_at or None)
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item and item[1] is not None and item[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    def execute(self, command, args):
+        with self._lock:
+            if command == b"PING":
+                return args[0] if args else "+PONG"
+            if command == b"GET":
+                item = self._live(args[0])
+                return item[0] if item else None
+            if command == b"SET":
+                expires_at = None
+                options = [a.upper() for a in args[2:]]
+                if b"EX" in options:
+                    expires_at = time.monotonic() + int(args[2 + options.index(b"EX") + 1])
+                elif b"PX" in options:
+                    expires_at = time.monotonic() + int(args[2 + options.index(b"PX") + 1]) / 1000
+                self._data[args[0]] = (args[1], expires_at)
+                return "+OK"
+            if command == b"DEL":
+                return sum(1 for key in args if self._live(key) and self._data.pop(key, None))
+            if command == b"EXISTS":
+                return sum(1 for key in args if self._live(key))
+            if command == b"DBSIZE":
+                return sum(1 for key in list(self._data) if self._live(key))
+            if command == b"FLUSHDB":
+                self._data.clear()
+                return "+OK"
+            if command == b"HELLO":
+                # Answered in the protocol version asked for; the handler encodes later nulls to match
+                info = {b"server": b"kv_standin", b"version": b"7.0.0", b"proto": int(args[0]) if args else 2,
+                        b"mode": b"standalone", b"role": b"master", b"modules": []}
+                return info if info[b"proto"] == 3 else [item for pair in info.items() for item in pair]
+            # redis-py may send CLIENT SETINFO / SELECT on connect; accepting them is harmless here
+            if command in (b"CLIENT", b"SELECT"):
+                return "+OK"
+            return Exception(f"ERR unknown command '{command.decode(errors='replace')}'")
+
+def _encode(reply, protocol=2):
+    if reply is None:
+        return b"_\r\n" if protocol == 3 else b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return f"-{reply}\r\n".encode("utf-8")
+    if isinstance(reply, str):
+        return reply.encode("utf-8") + b"\r\n"
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode("ascii")
+    if isinstance(reply, dict):   # RESP3 map
+        return b"%%%d\r\n" % len(reply) + b"".join(
+            _encode(k, protocol) + _encode(v, protocol) for k, v in reply.items()
+        )
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(item, protocol) for item in reply)
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+def make_handler(store):
+    class RespHandler(socketserver.StreamRequestHandler):
+        def _read_command(self):
+            line = self.rfile.readline()
+            if not line:
+                return None
+            if not line.startswith(b"*"):
+                return line.split()   # inline command, e.g. from telnet
+            parts = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                parts.append(self.rfile.read(length + 2)[:-2])
+            return parts
+
+        def handle(self):
+            protocol = 2   # until the client negotiates RESP3 with HELLO 3
+            while True:
+                parts = self._read_command()
+                if parts is None:
+                    return
+                if not parts:
+                    continue
+                command = parts[0].upper()
+                reply = store.execute(command, parts[1:])
+                if command == b"HELLO" and len(parts) > 1:
+                    protocol = int(parts[1])
+                self.wfile.write(_encode(reply, protocol))
+                self.wfile.flush()
+
+    return RespHandler
+
+class KVServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def start_kv_server(port=0):
+    """Start a stand-in server on a background thread; returns (server, redis URL)."""
+    server = KVServer(("127.0.0.1", port), make_handler(KVStore()))
+    threading.Thread(target=server.serve_forever, name="kv-standin", daemon=True).start()
+    return server, f"redis://127.0.0.1:{server.server_address[1]}/0"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the stand-in shared cache server")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    server, url = start_kv_server(args.port)
+    print(f"🧪 Stand-in cache listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
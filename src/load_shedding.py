@@ -0,0 +1,100 @@
+"""Admission control and graceful degradation for the generation path.
+
+At most MAX_CONCURRENT_GENERATIONS calls reach Ollama at once, and each
+request gets a deadline. A request that arrives when too many are already
+waiting, whose deadline expires, or whose generation fails (e.g. Ollama
+errors out) gets a fallback in this fixed order:
+
+1. a cached semantic answer for the same user,
+2. the top retrieved CounselChat answer with an empathetic preamble,
+3. a "busy" message.
+
+The crisis response is produced in the chat page before any of this runs,
+so it is never queued or shed.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from answer_cache import answer_cache
+
+# === CONFIG ===
+MAX_CONCURRENT_GENERATIONS = 4
+MAX_QUEUE_DEPTH = 8             # waiting requests beyond this are shed immediately
+GENERATION_DEADLINE_S = 45.0    # admission wait + generation
+
+EMPATHETIC_PREAMBLE = (
+    "I'm really glad you reached out, and I'm sorry things feel this way right now. "
+    "While I gather my thoughts, here is what a counselor shared with someone in a similar situation:\n\n"
+)
+BUSY_MESSAGE = (
+    "💛 I'm getting a lot of messages right now and couldn't answer in time. "
+    "Please try again in a moment — I want to give you a proper reply."
+)
+
+logger = logging.getLogger(__name__)
+
+class GenerationGate:
+    def __init__(self, max_concurrent=MAX_CONCURRENT_GENERATIONS, max_queue=MAX_QUEUE_DEPTH):
+        self.max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        # Generations keep running after a caller gives up, so they get their own threads
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="generate")
+
+    @property
+    def queue_depth(self):
+        return self._waiting
+
+    def run(self, fn, *args, deadline_s=GENERATION_DEADLINE_S):
+        """Run `fn(*args)` under admission control.
+
+        Returns (result, None) on success or (None, reason) when the request was
+        shed ("overloaded"), missed its deadline ("deadline") or `fn` raised ("error").
+        """
+        deadline = time.monotonic() + deadline_s
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                return None, "overloaded"
+            self._waiting += 1
+        try:
+            admitted = self._slots.acquire(timeout=deadline_s)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        if not admitted:
+            return None, "deadline"
+
+        future = self._executor.submit(fn, *args)
+        # The slot is held until Ollama is actually done, even if the caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic())), None
+        except FutureTimeout:
+            return None, "deadline"
+        except Exception as exc:
+            logger.warning("Generation failed, serving a fallback: %s", exc)
+            return None, "error"
+
+generation_gate = GenerationGate()
+
+def _counsel_answer_text(hit):
+    text = hit.text
+    if "Response:" in text:
+        text = text.split("Response:", 1)[1]
+    return text.strip()
+
+def degraded_answer(scope, query_vector, docs_counsel):
+    """Pick the best available fallback from RetrievedHits; returns (answer, fallback_name)."""
+    cached = answer_cache.lookup(scope, query_vector)
+    if cached:
+        return cached, "cached"
+    if docs_counsel:
+        counsel_text = _counsel_answer_text(docs_counsel[0])
+        if counsel_text:
+            return EMPATHETIC_PREAMBLE + counsel_text, "counsel"
+    return BUSY_MESSAGE, "busy"
+
+__all__ = ["GenerationGate", "generation_gate", "degraded_answer"]
@@ -0,0 +1,232 @@
+"""Concurrent-session load test for the chat turn, fully offline.
+
+Runs N simulated users through the same turn logic as pages/chat.py
+(crisis check, block checks, guidance, summary, retrieval, generation,
+history persistence and feedback) against stub Ollama embed/chat servers
+and the in-process Mongo stand-in. Everything it writes (small Chroma
+stores seeded from counsel_chat.csv, metrics/, journal and spill files)
+goes to a temporary working directory.
+
+    python src/load_test.py --sessions 50 --turns 5 --chat-latency 0.2 --token-latency 0.02
+
+Reports throughput, end-to-end and per-stage latency percentiles, how
+deep the generation queue and Ollama pools got, and how many turns were
+degraded or blocked.
+"""
+import argparse
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from stub_ollama import start_stub_server
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_INTERVAL_S = 0.1
+
+def load_questions(limit):
+    """Up to `limit` distinct (question, answer) pairs from counsel_chat.csv, used as the seed corpus and as user input.
+
+    The CSV has one row per therapist answer, so a question appears once per
+    answer; only its first answer is kept, otherwise `limit` rows would cover
+    far fewer distinct questions and the seeded stores would be full of duplicates.
+    """
+    pairs = {}
+    with (REPO_ROOT / "counsel_chat.csv").open(encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            question = " ".join((row.get("questionText") or row.get("questionTitle") or "").split())
+            answer = " ".join((row.get("answerText") or "").split())
+            if question and answer and question not in pairs:
+                pairs[question] = answer
+                if len(pairs) >= limit:
+                    break
+    return list(pairs.items())
+
+def _percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+class Sampler:
+    """Samples the generation queue and pool load while the test runs."""
+
+    def __init__(self, gate, pools):
+        self.gate = gate
+        self.pools = pools
+        self.queue_depths = []
+        self.pool_outstanding = {pool.name: [] for pool in pools}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(SAMPLE_INTERVAL_S):
+            self.queue_depths.append(self.gate.queue_depth)
+            for pool in self.pools:
+                self.pool_outstanding[pool.name].append(sum(s["outstanding"] for s in pool.stats().values()))
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the chat turn with stub Ollama and Mongo")
+    parser.add_argument("--sessions", type=int, default=50, help="simulated concurrent users")
+    parser.add_argument("--turns", type=int, default=5, help="questions per session")
+    parser.add_argument("--think-time", type=float, default=0.5, help="max seconds a user waits between turns")
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--chat-latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="seconds between streamed tokens")
+    parser.add_argument("--mongo-latency", type=float, default=0.002, help="seconds per Mongo round trip")
+    parser.add_argument("--corpus", type=int, default=300, help="distinct CounselChat questions seeded into each store")
+    parser.add_argument("--repeat-rate", type=float, default=0.3, help="chance a user re-asks an earlier question")
+    parser.add_argument("--downvote-rate", type=float, default=0.2)
+    parser.add_argument("--shared-cache", action="store_true", help="run the L2 cache on the kv_standin server (needs redis-py)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _, embed_url = start_stub_server(latency=args.embed_latency)
+    _, chat_url = start_stub_server(latency=args.chat_latency, token_latency=args.token_latency)
+    # The pools read these when first imported, so they must be set before rag_chain is loaded
+    os.environ["OLLAMA_EMBED_ENDPOINTS"] = embed_url
+    os.environ["OLLAMA_CHAT_ENDPOINTS"] = chat_url
+    if args.shared_cache:
+        from kv_standin import start_kv_server
+        os.environ["CACHE_URL"] = start_kv_server()[1]
+
+    pairs = load_questions(args.corpus)
+    workdir = Path(tempfile.mkdtemp(prefix="rag-load-"))
+    shutil.copytree(REPO_ROOT / "templates", workdir / "templates")
+    os.chdir(workdir)
+
+    import db as db_module
+    from mongo_standin import StandInClient
+    db_module.set_client(StandInClient(latency=args.mongo_latency))
+
+    from cache_tier import cache
+    from crisis import check_crisis
+    from conversation_store import append_messages
+    from downvote_index import DownvoteIndex
+    from feedback_writer import get_feedback_writer
+    from guidance_index import GuidanceIndex
+    from load_shedding import generation_gate
+    from ollama_pool import embed_pool, chat_pool
+    from pattern_learning import learn_from_votes
+    from rag_chain import vectorstore_counsel, vectorstore_empathy
+    from session_records import Message
+    from session_retrieval import SessionRetrieval
+    from tracing import stage_percentiles
+    from turn_pipeline import run_chat_turn
+
+    print(f"🧪 Seeding {len(pairs)} documents per store in {workdir} ...")
+    vectorstore_counsel.add_texts([f"Question: {q}\nResponse: {a}" for q, a in pairs])
+    vectorstore_empathy.add_texts([a for _, a in pairs])
+
+    db = db_module.get_bot_db()
+    guidance_index = GuidanceIndex(db["blocked_patterns"])
+    downvote_index = DownvoteIndex(db)
+    feedback_writer = get_feedback_writer(db, after_flush=learn_from_votes)
+
+    lock = threading.Lock()
+    latencies = []
+    outcomes = Counter()
+    retrieval_modes = Counter()
+    errors = []
+
+    def session(index):
+        user_id = f"load-user-{index}"
+        session_rng = random.Random(args.seed * 1000 + index)
+        asked, messages = [], []
+        retrieval = SessionRetrieval()
+        for _ in range(args.turns):
+            time.sleep(session_rng.uniform(0, args.think_time))
+            if asked and session_rng.random() < args.repeat_rate:
+                question = session_rng.choice(asked)
+            else:
+                question = session_rng.choice(pairs)[0]
+                asked.append(question)
+            timestamp = time.strftime("%H:%M:%S")
+            new = [Message("user", question, timestamp)]
+            start = time.perf_counter()
+            try:
+                crisis_start = time.perf_counter()
+                is_crisis = check_crisis(question)
+                crisis_secs = time.perf_counter() - crisis_start
+                if is_crisis:
+                    outcome, response = "crisis", "**🚨 Crisis Detected:** Please contact a professional."
+                else:
+                    turn = run_chat_turn(
+                        db, user_id, question,
+                        guidance_index=guidance_index,
+                        downvote_index=downvote_index,
+                        turn_count=len(messages),
+                        retrieval=retrieval,
+                        timings={"crisis_check": crisis_secs},
+                    )
+                    outcome = "blocked" if turn["blocked"] else turn["degraded"] or turn["route"]
+                    with lock:
+                        retrieval_modes[turn["retrieval"]] += 1
+                    response = turn["response"] or "⚠️ This question has been flagged multiple times. Please rephrase."
+                new.append(Message("assistant", response, timestamp))
+                append_messages(db, user_id, new)
+                messages += new
+                if outcome not in ("crisis", "blocked", "busy"):
+                    vote = "👎" if session_rng.random() < args.downvote_rate else "👍"
+                    feedback_writer.submit(user_id, question, response, vote)
+            except Exception as exc:
+                with lock:
+                    errors.append(repr(exc))
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                outcomes[outcome] += 1
+
+    sampler = Sampler(generation_gate, [embed_pool, chat_pool])
+    threads = [threading.Thread(target=session, args=(i,), name=f"session-{i}") for i in range(args.sessions)]
+    print(f"🚀 {args.sessions} sessions x {args.turns} turns ...")
+    sampler.start()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    sampler.stop()
+    feedback_writer.flush()
+
+    latencies.sort()
+    print(f"\n=== Results ({wall:.1f}s wall) ===")
+    print(f"Turns completed: {len(latencies)}  ({len(latencies) / wall:.2f} turns/s), errors: {len(errors)}")
+    if latencies:
+        print("End-to-end latency: " + ", ".join(
+            f"p{int(q * 100)} {_percentile(latencies, q) * 1000:.0f} ms" for q in (0.5, 0.95, 0.99)
+        ) + f", max {latencies[-1] * 1000:.0f} ms")
+    print("Outcomes: " + ", ".join(f"{name} {count}" for name, count in outcomes.most_common()))
+    print("Retrieval: " + ", ".join(f"{mode} {count}" for mode, count in retrieval_modes.most_common()))
+    if sampler.queue_depths:
+        depths = sampler.queue_depths
+        print(f"Generation queue depth: mean {sum(depths) / len(depths):.1f}, max {max(depths)}")
+    for name, samples in sampler.pool_outstanding.items():
+        if samples:
+            print(f"Ollama {name} pool in flight: mean {sum(samples) / len(samples):.1f}, max {max(samples)}")
+    print("Cache: " + ", ".join(f"{name} {count}" for name, count in cache.stats.items()))
+    print(f"Feedback stored: {db['feedback'].count_documents({})}, conversation messages: {db['conversations'].count_documents({})}")
+
+    print("\nStage             p50 ms    p95 ms   count")
+    for stage, stats in sorted(stage_percentiles().items()):
+        if "p50_ms" in stats:
+            print(f"{stage:<16} {stats['p50_ms']:>8} {stats['p95_ms']:>9} {stats['count']:>7}")
+    for error in Counter(errors).most_common(5):
+        print(f"❌ {error[1]}x {error[0]}", file=sys.stderr)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
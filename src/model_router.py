@@ -0,0 +1,82 @@
+"""Route each turn to the small or large local model using cheap features.
+
+Features are the message length, whether it looks like a greeting or an
+acknowledgement, the best retrieval distance and how far into the
+conversation we are. Per-route latency and feedback are kept in memory so
+the thresholds below can be tuned against real traffic.
+"""
+import re
+import threading
+from collections import deque
+
+# === CONFIG ===
+SHORT_MAX_WORDS = 8           # at or below this, a turn is a candidate for the small model
+RELEVANT_MAX_DISTANCE = 0.9   # a closer retrieval hit suggests a substantive topic
+LONG_CONVERSATION_MESSAGES = 6  # from here on, every turn (small talk included) goes to the large model
+LATENCY_WINDOW = 500
+
+SMALL_TALK = re.compile(
+    r"^\s*(hi|hey|hello|hiya|good (morning|afternoon|evening)|thanks|thank you|thx|ok(ay)?|"
+    r"cool|great|nice|got it|sure|yes|yeah|no|nope|bye|goodbye|see you)\b[\s!.?]*$",
+    re.IGNORECASE,
+)
+
+def route_features(question, retrieval_distances, turn_count):
+    return {
+        "words": len(question.split()),
+        "small_talk": bool(SMALL_TALK.match(question)),
+        "best_distance": min(retrieval_distances) if retrieval_distances else None,
+        "turn_count": turn_count,
+    }
+
+def choose_route(features):
+    """Return "small" or "large" for a feature dict from `route_features`."""
+    # Deep in a conversation even "ok" or "no" can carry weight, so it gets the large model
+    if features["turn_count"] >= LONG_CONVERSATION_MESSAGES:
+        return "large"
+    if features["small_talk"]:
+        return "small"
+    if features["words"] > SHORT_MAX_WORDS:
+        return "large"
+    best = features["best_distance"]
+    if best is not None and best <= RELEVANT_MAX_DISTANCE:
+        # Short, but close to a counselling topic: give it the full model
+        return "large"
+    return "small"
+
+def _percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+class RouteMetrics:
+    def __init__(self, window=LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._feedback = {}
+        self._window = window
+
+    def record_latency(self, route, seconds):
+        with self._lock:
+            self._latencies.setdefault(route, deque(maxlen=self._window)).append(seconds)
+
+    def record_feedback(self, route, feedback):
+        with self._lock:
+            counts = self._feedback.setdefault(route, {"👍": 0, "👎": 0})
+            counts[feedback] = counts.get(feedback, 0) + 1
+
+    def snapshot(self):
+        """Per-route request count, p50/p95 latency (ms) and feedback counts."""
+        with self._lock:
+            stats = {}
+            for route in set(self._latencies) | set(self._feedback):
+                samples = sorted(self._latencies.get(route, ()))
+                stats[route] = {
+                    "requests": len(samples),
+                    "p50_ms": round(_percentile(samples, 0.50) * 1000, 1) if samples else None,
+                    "p95_ms": round(_percentile(samples, 0.95) * 1000, 1) if samples else None,
+                    "feedback": dict(self._feedback.get(route, {})),
+                }
+            return stats
+
+route_metrics = RouteMetrics()
+
+__all__ = ["route_features", "choose_route", "RouteMetrics", "route_metrics"]
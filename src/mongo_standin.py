@@ -0,0 +1,281 @@
+"""In-process stand-in for the subset of pymongo the app uses, for load tests.
+
+Plug it in with `db.set_client(StandInClient())` before any page code asks
+for a database. Documents live in plain dicts guarded by one lock per
+collection, so concurrent sessions contend roughly the way they would on a
+single Mongo primary. An optional per-operation latency models the network
+round trip. Only the query and update operators the app actually issues are
+supported ($gt/$gte/$lt/$lte/$in/$ne, $set/$inc, include projections and
+$slice, and the aggregation stages $match, $group with $sum/$push/$firstN
+and $project with $slice); anything else raises NotImplementedError rather
+than silently matching. `server_version` is what server_info reports, so
+version-dependent pipelines can be exercised either way.
+"""
+import copy
+import threading
+import time
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+def _compare(value, op, operand):
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise NotImplementedError(f"Stand-in does not support query operator {op}")
+
+def matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    out = {"_id": doc["_id"]} if projection.get("_id", 1) else {}
+    for field, spec in projection.items():
+        if field == "_id" or field not in doc:
+            continue
+        if isinstance(spec, dict) and "$slice" in spec:
+            out[field] = copy.deepcopy(doc[field][:spec["$slice"]])
+        elif spec:
+            out[field] = copy.deepcopy(doc[field])
+    return out
+
+def _apply_update(doc, update):
+    for op, fields in update.items():
+        if op == "$set":
+            doc.update(copy.deepcopy(fields))
+        elif op == "$inc":
+            for field, amount in fields.items():
+                doc[field] = doc.get(field, 0) + amount
+        else:
+            raise NotImplementedError(f"Stand-in does not support update operator {op}")
+
+def _value(doc, expression):
+    return doc.get(expression[1:]) if isinstance(expression, str) and expression.startswith("$") else expression
+
+def _group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = _value(doc, spec["_id"])
+        group = groups.setdefault(key, {"_id": key})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, arg), = accumulator.items()
+            if op == "$sum":
+                group[field] = group.get(field, 0) + _value(doc, arg)
+            elif op == "$push":
+                group.setdefault(field, []).append(_value(doc, arg))
+            elif op == "$firstN":
+                values = group.setdefault(field, [])
+                if len(values) < arg["n"]:
+                    values.append(_value(doc, arg["input"]))
+            else:
+                raise NotImplementedError(f"Stand-in does not support accumulator {op}")
+    return list(groups.values())
+
+def _project_stage(doc, spec):
+    out = {"_id": doc["_id"]} if spec.get("_id", 1) else {}
+    for field, expression in spec.items():
+        if field == "_id":
+            continue
+        if isinstance(expression, dict) and "$slice" in expression:
+            array, n = expression["$slice"]
+            out[field] = _value(doc, array)[:n]
+        elif expression == 1 and field in doc:
+            out[field] = doc[field]
+        elif expression != 1:
+            raise NotImplementedError(f"Stand-in does not support projection {expression}")
+    return out
+
+class UpdateResult:
+    def __init__(self, matched_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = matched_count
+        self.upserted_id = upserted_id
+
+class Cursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction=1):
+        self._docs.sort(key=lambda doc: (doc.get(key) is not None, doc.get(key)), reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        if count:
+            self._docs = self._docs[:count]
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
+
+class StandInCollection:
+    def __init__(self, name, latency):
+        self.name = name
+        self.latency = latency
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _find_unlocked(self, query):
+        return [doc for doc in self._docs.values() if matches(doc, query or {})]
+
+    def _upsert_unlocked(self, query, update, upsert):
+        found = self._find_unlocked(query)
+        if found:
+            _apply_update(found[0], update)
+            return found[0], UpdateResult(1)
+        if not upsert:
+            return None, UpdateResult(0)
+        doc = {k: copy.deepcopy(v) for k, v in query.items() if not isinstance(v, dict)}
+        doc.setdefault("_id", ObjectId())
+        _apply_update(doc, update)
+        self._docs[doc["_id"]] = doc
+        return doc, UpdateResult(0, doc["_id"])
+
+    def create_index(self, keys, **kwargs):
+        return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+    def find_one(self, query=None, projection=None):
+        self._round_trip()
+        with self._lock:
+            found = self._find_unlocked(query)
+            return _project(found[0], projection) if found else None
+
+    def find(self, query=None, projection=None):
+        self._round_trip()
+        with self._lock:
+            return Cursor([_project(doc, projection) for doc in self._find_unlocked(query)])
+
+    def insert_one(self, doc):
+        self._round_trip()
+        with self._lock:
+            doc.setdefault("_id", ObjectId())
+            if doc["_id"] in self._docs:
+                raise DuplicateKeyError(f"E11000 duplicate key error _id: {doc['_id']}", 11000)
+            self._docs[doc["_id"]] = copy.deepcopy(doc)
+
+    def insert_many(self, docs, ordered=True):
+        """Like Mongo, a duplicate _id is a write error: ordered inserts stop there, unordered ones skip it."""
+        self._round_trip()
+        write_errors, inserted = [], 0
+        with self._lock:
+            for index, doc in enumerate(docs):
+                doc.setdefault("_id", ObjectId())
+                if doc["_id"] in self._docs:
+                    write_errors.append({"index": index, "code": 11000,
+                                         "errmsg": f"E11000 duplicate key error _id: {doc['_id']}"})
+                    if ordered:
+                        break
+                    continue
+                self._docs[doc["_id"]] = copy.deepcopy(doc)
+                inserted += 1
+        if write_errors:
+            raise BulkWriteError({"writeErrors": write_errors, "writeConcernErrors": [], "nInserted": inserted})
+
+    def update_one(self, query, update, upsert=False):
+        self._round_trip()
+        with self._lock:
+            return self._upsert_unlocked(query, update, upsert)[1]
+
+    def find_one_and_update(self, query, update, upsert=False, return_document=ReturnDocument.BEFORE, projection=None):
+        self._round_trip()
+        with self._lock:
+            found = self._find_unlocked(query)
+            before = copy.deepcopy(found[0]) if found else None
+            after, _ = self._upsert_unlocked(query, update, upsert)
+            doc = after if return_document == ReturnDocument.AFTER else before
+            return _project(doc, projection) if doc else None
+
+    def bulk_write(self, requests, ordered=True):
+        """Applies UpdateOne requests under one lock, as a single round trip."""
+        self._round_trip()
+        with self._lock:
+            for request in requests:
+                self._upsert_unlocked(request._filter, request._doc, request._upsert)
+
+    def delete_many(self, query):
+        self._round_trip()
+        with self._lock:
+            for doc in self._find_unlocked(query):
+                del self._docs[doc["_id"]]
+
+    def count_documents(self, query):
+        self._round_trip()
+        with self._lock:
+            return len(self._find_unlocked(query))
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        self._round_trip()
+        with self._lock:
+            docs = copy.deepcopy(list(self._docs.values()))
+        for stage in pipeline:
+            (name, spec), = stage.items()
+            if name == "$match":
+                docs = [doc for doc in docs if matches(doc, spec)]
+            elif name == "$group":
+                docs = _group(docs, spec)
+            elif name == "$project":
+                docs = [_project_stage(doc, spec) for doc in docs]
+            else:
+                raise NotImplementedError(f"Stand-in does not support aggregation stage {name}")
+        return Cursor(docs)
+
+    def estimated_document_count(self):
+        self._round_trip()
+        return len(self._docs)
+
+class StandInDatabase:
+    def __init__(self, name, latency, client=None):
+        self.name = name
+        self.latency = latency
+        self.client = client
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = StandInCollection(name, self.latency)
+            return self._collections[name]
+
+class StandInClient:
+    def __init__(self, latency=0.0, server_version=(7, 0, 0)):
+        self.latency = latency
+        self.server_version = server_version
+        self._databases = {}
+        self._lock = threading.Lock()
+
+    def get_database(self, name, read_preference=None):
+        with self._lock:
+            if name not in self._databases:
+                self._databases[name] = StandInDatabase(name, self.latency, self)
+            return self._databases[name]
+
+    def server_info(self):
+        return {"version": ".".join(map(str, self.server_version)), "versionArray": [*self.server_version, 0]}
+
+__all__ = ["StandInClient"]
@@ -0,0 +1,136 @@
+"""Client pools spreading embedding and chat calls over several Ollama endpoints.
+
+Endpoints come from OLLAMA_EMBED_ENDPOINTS / OLLAMA_CHAT_ENDPOINTS (comma
+separated, defaulting to OLLAMA_HOST or the local default). Each call goes to
+the healthy endpoint with the fewest outstanding requests and is retried on
+another endpoint if it fails. A background thread probes `/api/tags` so
+failed endpoints come back into rotation once they recover.
+"""
+import os
+import threading
+import time
+
+import requests
+from langchain.chat_models import ChatOllama
+
+# === CONFIG ===
+DEFAULT_ENDPOINT = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+PROBE_INTERVAL_S = 10.0
+PROBE_TIMEOUT_S = 2.0
+
+def endpoints_from_env(var):
+    raw = os.environ.get(var, DEFAULT_ENDPOINT)
+    return [url.strip().rstrip("/") for url in raw.split(",") if url.strip()]
+
+class OllamaEndpointPool:
+    def __init__(self, name, urls, probe_interval=PROBE_INTERVAL_S):
+        self.name = name
+        self.urls = list(urls)
+        self._lock = threading.Lock()
+        self._outstanding = {url: 0 for url in self.urls}
+        self._healthy = {url: True for url in self.urls}
+        self._probe_interval = probe_interval
+        if len(self.urls) > 1 and probe_interval:
+            threading.Thread(target=self._probe_loop, name=f"ollama-probe-{name}", daemon=True).start()
+
+    def probe(self, url):
+        try:
+            healthy = requests.get(f"{url}/api/tags", timeout=PROBE_TIMEOUT_S).ok
+        except requests.RequestException:
+            healthy = False
+        with self._lock:
+            self._healthy[url] = healthy
+        return healthy
+
+    def _probe_loop(self):
+        while True:
+            for url in self.urls:
+                self.probe(url)
+            time.sleep(self._probe_interval)
+
+    def _acquire(self, tried):
+        with self._lock:
+            candidates = [u for u in self.urls if u not in tried and self._healthy[u]]
+            # If everything looks down, still try the untried ones rather than failing outright
+            candidates = candidates or [u for u in self.urls if u not in tried]
+            if not candidates:
+                return None
+            url = min(candidates, key=lambda u: self._outstanding[u])
+            self._outstanding[url] += 1
+            return url
+
+    def _release(self, url, ok):
+        with self._lock:
+            self._outstanding[url] -= 1
+            if not ok:
+                self._healthy[url] = False
+
+    def call(self, fn):
+        """Run `fn(url)` on the least-loaded endpoint, retrying once on each other endpoint."""
+        tried = set()
+        last_error = None
+        while True:
+            url = self._acquire(tried)
+            if url is None:
+                raise last_error or RuntimeError(f"No Ollama endpoints configured for {self.name}")
+            tried.add(url)
+            try:
+                result = fn(url)
+            except Exception as exc:
+                self._release(url, ok=False)
+                last_error = exc
+                continue
+            self._release(url, ok=True)
+            return result
+
+    def stream(self, fn):
+        """Like `call` for a generator `fn(url)`; a node is only retried before its first chunk."""
+        tried = set()
+        last_error = None
+        while True:
+            url = self._acquire(tried)
+            if url is None:
+                raise last_error or RuntimeError(f"No Ollama endpoints configured for {self.name}")
+            tried.add(url)
+            started = False
+            ok = False
+            try:
+                for chunk in fn(url):
+                    started = True
+                    yield chunk
+                ok = True
+                return
+            except Exception as exc:
+                if started:
+                    raise
+                last_error = exc
+            finally:
+                # Also runs if the consumer stops early, so the outstanding count stays right
+                self._release(url, ok=ok or started)
+
+    def stats(self):
+        with self._lock:
+            return {url: {"healthy": self._healthy[url], "outstanding": self._outstanding[url]} for url in self.urls}
+
+class PooledChatOllama:
+    """ChatOllama spread over an endpoint pool; exposes `invoke` and `stream` like the single client."""
+
+    def __init__(self, pool, **chat_kwargs):
+        self.pool = pool
+        self.model = chat_kwargs["model"]
+        self._clients = {url: ChatOllama(base_url=url, **chat_kwargs) for url in pool.urls}
+
+    def invoke(self, prompt):
+        return self.pool.call(lambda url: self._clients[url].invoke(prompt))
+
+    def stream(self, prompt):
+        return self.pool.stream(lambda url: self._clients[url].stream(prompt))
+
+# Separate pools so long generations never starve query embedding
+embed_pool = OllamaEndpointPool("embed", endpoints_from_env("OLLAMA_EMBED_ENDPOINTS"))
+chat_pool = OllamaEndpointPool("chat", endpoints_from_env("OLLAMA_CHAT_ENDPOINTS"))
+
+__all__ = [
+    "OllamaEndpointPool", "PooledChatOllama",
+    "embed_pool", "chat_pool", "endpoints_from_env",
+]
@@ -1,17 +1,27 @@
 import streamlit as st
 import datetime
-from pymongo import MongoClient
+import pandas as pd
 from langchain.chains.summarize import load_summarize_chain
 from langchain.docstore.document import Document
 from langchain.chat_models import ChatOllama
-from rag_chain import combined_qa_run, vectorstore_counsel, vectorstore_empathy
+from crisis import check_crisis
+from db import get_bot_db
+from feedback_writer import get_feedback_writer
+from turn_pipeline import run_chat_turn, retire_answer
+from session_retrieval import SessionRetrieval
+from session_records import Message, PendingFeedback
+from model_router import route_metrics
+from guidance_index import GuidanceIndex
+from pattern_learning import learn_from_votes, PatternRebuilder
+from downvote_index import DownvoteIndex
+from conversation_store import WINDOW_SIZE, append_messages, load_page, load_recent
+from journal_search import schedule_index
+from tracing import record_trace, stage_percentiles
 import time
 
 # === MongoDB Setup ===
-client = MongoClient("mongodb://localhost:27017/")
-db = client["mental_health_bot"]
+db = get_bot_db()  # pooled process-wide client; indexes are created on first use
 summary_collection = db["user_summaries"]
-feedback_collection = db["feedback"]
 blocked_patterns_collection = db["blocked_patterns"]  # New collection for learning from bad feedback
 
 # === Enhanced Summarization Setup ===
@@ -22,87 +32,38 @@ llm = ChatOllama(
 )
 summarize_chain = load_summarize_chain(llm, chain_type="stuff")
 
-CRISIS_KEYWORDS = ["suicide", "kill myself", "self harm", "end my life", "want to die", "hurting myself", "cutting", "hopeless", "no reason to live"]
-
-def check_crisis(text):
-    return any(keyword in text.lower() for keyword in CRISIS_KEYWORDS)
-
 def generate_and_store_summary(user_id, conversation):
-    conversation_text = "\n".join([msg["content"] for msg in conversation if msg["role"] == "user"])
+    conversation_text = "\n".join([msg.content for msg in conversation if msg.role == "user"])
     if not conversation_text.strip(): return
     docs = [Document(page_content=conversation_text)]
     summary = summarize_chain.run(docs)
     summary_collection.update_one({"user_id": user_id}, {"$set": {"summary": summary, "last_updated": datetime.datetime.utcnow()}}, upsert=True)
 
-def is_response_blocked(user_id, question):
-    return feedback_collection.count_documents({"user": user_id, "question": question, "feedback": "👎"}) >= 10
+@st.cache_resource
+def get_downvote_index():
+    """Centroids of downvoted-question clusters, shared across reruns and sessions"""
+    return DownvoteIndex(db)
 
-def get_blocked_patterns():
-    """Get patterns from questions that received 10+ bad feedbacks"""
-    pipeline = [
-        {"$match": {"feedback": "👎"}},
-        {"$group": {"_id": "$question", "bad_count": {"$sum": 1}}},
-        {"$match": {"bad_count": {"$gte": 10}}},
-        {"$project": {"question": "$_id", "bad_count": 1}}
-    ]
-    return list(feedback_collection.aggregate(pipeline))
+@st.cache_resource
+def get_guidance_index():
+    """One guidance index per process, shared across reruns and sessions"""
+    return GuidanceIndex(blocked_patterns_collection)
 
-def analyze_and_store_bad_patterns():
-    """Analyze badly rated questions and store patterns for LLaMA to learn from"""
-    bad_patterns = get_blocked_patterns()
-    
-    for pattern in bad_patterns:
-        question = pattern["question"]
-        bad_responses = list(feedback_collection.find(
-            {"question": question, "feedback": "👎"}
-        ).limit(5))  # Get sample of bad responses
-        
-        # Create learning pattern
-        learning_data = {
-            "question_pattern": question,
-            "bad_response_examples": [resp["response"] for resp in bad_responses],
-            "guidance": f"When users ask similar questions to '{question}', avoid responses that are too generic, clinical, or dismissive. Focus on empathetic, personalized responses.",
-            "created_at": datetime.datetime.utcnow()
-        }
-        
-        blocked_patterns_collection.update_one(
-            {"question_pattern": question},
-            {"$set": learning_data},
-            upsert=True
-        )
+def refresh_after_downvotes(db, events):
+    """Feedback flush hook, run after learn_from_votes: pick up anything it just learned at once"""
+    if any(event["feedback"] == "👎" for event in events):
+        get_guidance_index().request_refresh()
 
-def get_response_guidance(question):
-    """Get guidance for LLaMA on how NOT to respond based on past bad feedback"""
-    blocked_patterns = list(blocked_patterns_collection.find())
-    
-    guidance = ""
-    for pattern in blocked_patterns:
-        if any(word in question.lower() for word in pattern["question_pattern"].lower().split()):
-            guidance += f"\n⚠️ Guidance: {pattern['guidance']}\n"
-            guidance += f"❌ Avoid responses like: {pattern['bad_response_examples'][0][:100]}...\n"
-    
-    return guidance
+# Hooks are shared with the other pages' writer: learn_from_votes is registered once and runs first
+feedback_writer = get_feedback_writer(db, after_flush=learn_from_votes)
+feedback_writer.add_hook(refresh_after_downvotes)
 
-# === Enhanced Combined QA Function ===
-def enhanced_qa_run(query, user_question):
-    """Enhanced QA with guidance"""
-    # Get guidance from past bad feedback
-    guidance = get_response_guidance(user_question)
-    
-    # Enhanced query with guidance
-    enhanced_query = f"""
-    {query}
-    
-    {guidance}
-    
-    Instructions: Provide an empathetic, personalized response. Avoid generic advice.
-    """
-    
-    start_time = time.time()
-    response = combined_qa_run(enhanced_query)
-    end_time = time.time()
-    
-    return response
+@st.cache_resource
+def get_pattern_rebuilder():
+    """Scheduled full rebuild of learning patterns, one background thread per process"""
+    return PatternRebuilder(db, on_rebuild=lambda: get_guidance_index().request_refresh())
+
+get_pattern_rebuilder()
 
 # === Streamlit UI Setup ===
 st.set_page_config(page_title="🧠 Mental Health Coping Companion", layout="wide")
@@ -147,55 +108,95 @@ if not st.session_state.get("logged_in"):
     st.stop()
 
 user_id = st.session_state["username"]
-stored_summary_doc = summary_collection.find_one({"user_id": user_id}) or {}
-stored_summary = stored_summary_doc.get("summary", "")
 
-# Initialize session state
+FEEDBACK_PENDING_LIMIT = 3  # unrated responses kept in the session
+
+# Initialize session state; history lives server-side, the session only holds a recent window
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.messages, st.session_state.has_older = load_recent(db, user_id)
+    st.session_state.older_messages = []
+    st.session_state.session_messages = 0   # sent in this session; restored history doesn't count
+    schedule_index(user_id)  # catch up on journal entries written since the last visit
 if "feedback_store" not in st.session_state:
-    st.session_state.feedback_store = {}
+    st.session_state.feedback_store = []  # PendingFeedback records, oldest first
 if "last_input" not in st.session_state:
     st.session_state.last_input = None
     st.session_state.last_retrieved_docs_counsel = []
     st.session_state.last_retrieved_docs_empathy = []
+if "last_turn_timings" not in st.session_state:
+    st.session_state.last_turn_timings = {}
+if "retrieval" not in st.session_state:
+    st.session_state.retrieval = SessionRetrieval()  # running topic + cached candidates for follow-ups
 
 # Handle pending user input
 if "pending_user_input" in st.session_state:
     pending_input = st.session_state.pop("pending_user_input")
     timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-    st.session_state.messages.append({"role": "user", "content": pending_input, "time": timestamp})
+    first_new = len(st.session_state.messages)
+    st.session_state.messages.append(Message("user", pending_input, timestamp))
+
+    crisis_start = time.perf_counter()
+    is_crisis = check_crisis(pending_input)
+    crisis_secs = time.perf_counter() - crisis_start
 
-    if check_crisis(pending_input):
-        st.session_state.messages.append({"role": "assistant", "content": "**🚨 Crisis Detected:** Please contact a professional.", "time": timestamp})
-    elif is_response_blocked(user_id, pending_input):
-        st.session_state.messages.append({"role": "assistant", "content": "⚠️ This question has been flagged multiple times. Please rephrase.", "time": timestamp})
+    if is_crisis:
+        record_trace({"crisis_check": crisis_secs, "total": crisis_secs, "route": "crisis", "degraded": None, "blocked": False})
+        st.session_state.messages.append(Message("assistant", "**🚨 Crisis Detected:** Please contact a professional.", timestamp))
     else:
         with st.spinner("🧠 Generating response..."):
-            query = f"User's Summary:\n{stored_summary}\n\nUser's Question:\n{pending_input}"
-            
-            # Use enhanced QA function
-            response = enhanced_qa_run(query, pending_input)
-        
-        st.session_state.messages.append({"role": "assistant", "content": response, "time": timestamp})
-        st.session_state.feedback_store[pending_input] = {"response": response, "submitted": False}
-        st.session_state.last_input = pending_input
-        st.session_state.last_retrieved_docs_counsel = vectorstore_counsel.similarity_search(pending_input, k=2)
-        st.session_state.last_retrieved_docs_empathy = vectorstore_empathy.similarity_search(pending_input, k=2)
+            # Block check, guidance, summary and retrieval run concurrently
+            turn = run_chat_turn(
+                db, user_id, pending_input,
+                guidance_index=get_guidance_index(),
+                downvote_index=get_downvote_index(),
+                turn_count=st.session_state.session_messages + 1,
+                retrieval=st.session_state.retrieval,
+                timings={"crisis_check": crisis_secs},
+            )
+        st.session_state.last_turn_timings = turn["timings"]
+
+        if turn["blocked"]:
+            st.session_state.messages.append(Message("assistant", "⚠️ This question has been flagged multiple times. Please rephrase.", timestamp))
+        else:
+            response = turn["response"]
+            st.session_state.messages.append(Message("assistant", response, timestamp))
+            if turn["degraded"] != "busy":
+                pending = [f for f in st.session_state.feedback_store if not f.submitted and f.question != pending_input]
+                pending.append(PendingFeedback(pending_input, response, turn["route"], turn["answer_key"], turn["cluster_id"]))
+                st.session_state.feedback_store = pending[-FEEDBACK_PENDING_LIMIT:]
+            st.session_state.last_input = pending_input
+            st.session_state.last_retrieved_docs_counsel = turn["docs_counsel"]
+            st.session_state.last_retrieved_docs_empathy = turn["docs_empathy"]
+
+    new_messages = st.session_state.messages[first_new:]
+    st.session_state.session_messages += len(new_messages)
+    append_messages(db, user_id, new_messages)
+    if len(st.session_state.messages) > WINDOW_SIZE:
+        st.session_state.messages = st.session_state.messages[-WINDOW_SIZE:]
+        st.session_state.older_messages = []
+        st.session_state.has_older = True
 
 # === Display Chat History ===
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
-        st.markdown(f"<div class='timestamp'>{msg['time']}</div>", unsafe_allow_html=True)
+if st.session_state.has_older:
+    if st.button("⬆️ Load earlier messages"):
+        oldest_id = (st.session_state.older_messages or st.session_state.messages)[0].id
+        page, st.session_state.has_older = load_page(db, user_id, before_id=oldest_id)
+        st.session_state.older_messages = page + st.session_state.older_messages
+        st.rerun()
+
+for msg in st.session_state.older_messages + st.session_state.messages:
+    with st.chat_message(msg.role):
+        st.markdown(msg.content)
+        st.markdown(f"<div class='timestamp'>{msg.time}</div>", unsafe_allow_html=True)
 
 # === Enhanced Feedback Section ===
-pending_feedback = {k: v for k, v in st.session_state.feedback_store.items() if not v["submitted"]}
+pending_feedback = [f for f in st.session_state.feedback_store if not f.submitted]
 
 if pending_feedback:
     st.markdown("### 💬 Rate the last response:")
     
-    for question, data in pending_feedback.items():
+    for pending in pending_feedback:
+        question = pending.question
         st.markdown(f"**Question:** {question[:100]}{'...' if len(question) > 100 else ''}")
         
         # Create side-by-side feedback buttons
@@ -203,29 +204,20 @@ if pending_feedback:
         
         with col1:
             if st.button("👍 Good", key=f"good_{hash(question)}", help="This response was helpful"):
-                feedback_collection.insert_one({
-                    "user": user_id, "question": question, "response": data["response"],
-                    "feedback": "👍", "timestamp": datetime.datetime.utcnow()
-                })
-                st.session_state.feedback_store[question]["submitted"] = True
+                feedback_writer.submit(user_id, question, pending.response, "👍")
+                route_metrics.record_feedback(pending.route, "👍")
+                pending.submitted = True
                 st.success("✅ Thank you for your feedback!")
                 st.rerun()
         
         with col2:
             if st.button("👎 Bad", key=f"bad_{hash(question)}", help="This response needs improvement"):
-                feedback_collection.insert_one({
-                    "user": user_id, "question": question, "response": data["response"],
-                    "feedback": "👎", "timestamp": datetime.datetime.utcnow()
-                })
-                st.session_state.feedback_store[question]["submitted"] = True
-                
-                # Check if this reaches 10 bad feedbacks and update learning patterns
-                bad_count = feedback_collection.count_documents({"question": question, "feedback": "👎"})
-                if bad_count >= 10:
-                    analyze_and_store_bad_patterns()
-                    st.warning(f"⚠️ This question pattern has received {bad_count} negative feedbacks. The AI will learn from this.")
-                else:
-                    st.info(f"📝 Feedback recorded. ({bad_count}/10 negative feedbacks for this pattern)")
+                # Counters and per-question learning are applied when the writer flushes
+                feedback_writer.submit(user_id, question, pending.response, "👎")
+                route_metrics.record_feedback(pending.route, "👎")
+                retire_answer(user_id, pending.response, pending.answer_key, pending.cluster_id)   # don't serve this answer again
+                pending.submitted = True
+                st.info("📝 Feedback recorded. Questions with 10+ negative feedbacks are learned from automatically.")
                 st.rerun()
         
         st.markdown("---")
@@ -240,22 +232,24 @@ if user_input:
 if st.session_state.last_input:
     with st.expander(f"🔎 Retrieved for: '{st.session_state.last_input}'", expanded=False):
         st.subheader("🗂 Counsel Dataset:")
-        for i, doc in enumerate(st.session_state.last_retrieved_docs_counsel, 1):
-            st.markdown(f"**Doc {i}:** {doc.page_content}")
+        for i, hit in enumerate(st.session_state.last_retrieved_docs_counsel, 1):
+            st.markdown(f"**Doc {i}:** {hit.text}")
         st.subheader("🗂 Empathetic Dataset:")
-        for i, doc in enumerate(st.session_state.last_retrieved_docs_empathy, 1):
-            st.markdown(f"**Doc {i}:** {doc.page_content}")
+        for i, hit in enumerate(st.session_state.last_retrieved_docs_empathy, 1):
+            st.markdown(f"**Doc {i}:** {hit.text}")
 
 with st.sidebar:
     st.header("⚙️ Session Options")
     
     # Performance stats
-    bad_patterns_count = blocked_patterns_collection.count_documents({})
+    bad_patterns_count = blocked_patterns_collection.estimated_document_count()
     st.metric("📚 Learned Patterns", bad_patterns_count)
     
     if st.button("🔄 Refresh Learning Patterns"):
-        analyze_and_store_bad_patterns()
-        st.success("✅ Learning patterns updated!")
+        get_pattern_rebuilder().request_rebuild()
+        st.success("✅ Learning pattern rebuild started in the background!")
+    if get_pattern_rebuilder().last_rebuild:
+        st.caption(f"Last full rebuild: {get_pattern_rebuilder().last_rebuild:%Y-%m-%d %H:%M} UTC")
     
     if st.button("✅ Save Summary"):
         generate_and_store_summary(user_id, st.session_state.messages)
@@ -267,6 +261,17 @@ with st.sidebar:
         st.session_state.clear()
         st.rerun()
         
+    # Latency panel over recent requests in this process
+    with st.expander("⏱️ Latency (recent requests)"):
+        percentiles = stage_percentiles()
+        if percentiles:
+            st.table(pd.DataFrame.from_dict(percentiles, orient="index").sort_index())
+        else:
+            st.caption("No requests traced yet.")
+
     # Debug section
     with st.expander("🔧 Debug Info"):
-        st.write("Session State Keys:", list(st.session_state.keys()))
\ No newline at end of file
+        st.write("Session State Keys:", list(st.session_state.keys()))
+        if st.session_state.last_turn_timings:
+            st.write("Last turn timings (ms):", {step: round(secs * 1000, 1) for step, secs in st.session_state.last_turn_timings.items()})
+        st.write("Model routes:", route_metrics.snapshot())
\ No newline at end of file
@@ -1,26 +1,23 @@
 import streamlit as st
 import datetime
-from pymongo import MongoClient
 from langchain.chains.summarize import load_summarize_chain
 from langchain.docstore.document import Document
 from langchain.chat_models import ChatOllama
+from crisis import check_crisis
+from db import get_bot_db
+from feedback_counters import is_question_blocked
+from feedback_writer import get_feedback_writer
+from pattern_learning import learn_from_votes
 from rag_chain import combined_qa_run, vectorstore_counsel, vectorstore_empathy
 
 # === MongoDB Setup ===
-client = MongoClient("mongodb://localhost:27017/")
-db = client["mental_health_bot"]
+db = get_bot_db()  # pooled process-wide client; indexes are created on first use
 summary_collection = db["user_summaries"]
-feedback_collection = db["feedback"]
 
 # === Summarization Setup ===
 llm = ChatOllama(model="llama3:instruct")
 summarize_chain = load_summarize_chain(llm, chain_type="stuff")
 
-CRISIS_KEYWORDS = ["suicide", "kill myself", "self harm", "end my life", "want to die", "hurting myself", "cutting", "hopeless", "no reason to live"]
-
-def check_crisis(text):
-    return any(keyword in text.lower() for keyword in CRISIS_KEYWORDS)
-
 def generate_and_store_summary(user_id, conversation):
     conversation_text = "\n".join([msg["content"] for msg in conversation if msg["role"] == "user"])
     if not conversation_text.strip(): return
@@ -28,8 +25,10 @@ def generate_and_store_summary(user_id, conversation):
     summary = summarize_chain.run(docs)
     summary_collection.update_one({"user_id": user_id}, {"$set": {"summary": summary, "last_updated": datetime.datetime.utcnow()}}, upsert=True)
 
+feedback_writer = get_feedback_writer(db, after_flush=learn_from_votes)
+
 def is_response_blocked(user_id, question):
-    return feedback_collection.count_documents({"user": user_id, "question": question, "feedback": "👎"}) >= 10
+    return is_question_blocked(db, user_id, question)
 
 # === Streamlit UI Setup ===
 st.set_page_config(page_title="🧠 Mental Health Coping Companion", layout="wide")
@@ -95,18 +94,12 @@ for question, data in st.session_state.feedback_store.items():
         cols = st.columns(2)
         with cols[0]:
             if st.button("👍", key=f"good_{question}"):
-                feedback_collection.insert_one({
-                    "user": user_id, "question": question, "response": data["response"],
-                    "feedback": "👍", "timestamp": datetime.datetime.utcnow()
-                })
+                feedback_writer.submit(user_id, question, data["response"], "👍")
                 st.session_state.feedback_store[question]["submitted"] = True
                 st.success("Thank you for your feedback!")
         with cols[1]:
             if st.button("👎", key=f"bad_{question}"):
-                feedback_collection.insert_one({
-                    "user": user_id, "question": question, "response": data["response"],
-                    "feedback": "👎", "timestamp": datetime.datetime.utcnow()
-                })
+                feedback_writer.submit(user_id, question, data["response"], "👎")
                 st.session_state.feedback_store[question]["submitted"] = True
                 st.success("Feedback recorded. Thanks!")
 
@@ -0,0 +1,11 @@
+import streamlit as st
+from journal_ui import render_journal
+
+st.set_page_config(page_title="📓 Journal - Coping Companion", layout="wide")
+st.title("📓 My Journal")
+
+if not st.session_state.get("logged_in"):
+    st.warning("⚠️ Please log in from the Home page.")
+    st.stop()
+
+render_journal(st.session_state["username"])
@@ -0,0 +1,153 @@
+"""Learning `blocked_patterns` from 👎 feedback.
+
+A flush whose votes take questions past the threshold re-learns just those
+questions (one aggregation plus one bulk_write). The full rebuild (the same
+aggregation over every question) runs on a background thread at a fixed
+interval or when requested from the sidebar, so feedback clicks never wait
+on it. Both sample bad responses with $firstN on MongoDB 5.2+ and with
+$push plus $slice on older servers.
+
+Both paths are cluster-aware: once cluster_downvoted.py has grouped
+near-duplicate questions, a question in a cluster is learned as its
+cluster's representative, so neither path re-creates the per-question
+patterns the clustering collapsed.
+"""
+import datetime
+import logging
+import threading
+import weakref
+
+from pymongo import UpdateOne
+
+from feedback_counters import DOWNVOTE_THRESHOLD, normalize_question
+
+# === CONFIG ===
+SAMPLE_BAD_RESPONSES = 5
+REBUILD_INTERVAL_S = 3600.0
+
+logger = logging.getLogger(__name__)
+
+def _learning_data(question, bad_responses):
+    return {
+        "question_pattern": question,
+        "bad_response_examples": bad_responses,
+        "guidance": f"When users ask similar questions to '{question}', avoid responses that are too generic, clinical, or dismissive. Focus on empathetic, personalized responses.",
+        "created_at": datetime.datetime.utcnow()
+    }
+
+_first_n_support = weakref.WeakKeyDictionary()   # client -> whether its server has $firstN
+
+def _supports_first_n(db):
+    client = db.client
+    if client not in _first_n_support:
+        _first_n_support[client] = tuple(client.server_info()["versionArray"][:2]) >= (5, 2)
+    return _first_n_support[client]
+
+def _bad_response_samples(db, match, min_count=0):
+    """Rows of {_id: question, bad_count, responses} for the 👎 feedback matching `match`"""
+    if _supports_first_n(db):
+        # Keeps each group's sample bounded however many votes arrive
+        sample, trim = {"$firstN": {"input": "$response", "n": SAMPLE_BAD_RESPONSES}}, []
+    else:
+        sample = {"$push": "$response"}
+        trim = [{"$project": {"bad_count": 1, "responses": {"$slice": ["$responses", SAMPLE_BAD_RESPONSES]}}}]
+    pipeline = [
+        {"$match": {"feedback": "👎", **match}},
+        {"$group": {"_id": "$question", "bad_count": {"$sum": 1}, "responses": sample}},
+        {"$match": {"bad_count": {"$gte": min_count}}},
+        *trim,
+    ]
+    return db["feedback"].aggregate(pipeline, allowDiskUse=True)
+
+def _pattern_update(question, bad_responses):
+    return UpdateOne({"question_pattern": question}, {"$set": _learning_data(question, bad_responses)}, upsert=True)
+
+def learn_questions(db, questions):
+    """Store or refresh the learning patterns of badly rated questions in one bulk_write"""
+    samples = {row["_id"]: row["responses"] for row in _bad_response_samples(db, {"question": {"$in": questions}})}
+    db["blocked_patterns"].bulk_write(
+        [_pattern_update(question, samples.get(question, [])) for question in questions], ordered=False
+    )
+
+def learn_question(db, question):
+    """Store or refresh the learning pattern for a single badly rated question"""
+    learn_questions(db, [question])
+
+def cluster_representatives(db):
+    """Map question_key -> representative question for every member of the current downvote clusters"""
+    meta = db["downvote_clusters_meta"].find_one({"_id": "current"})
+    if not meta:
+        return {}
+    representatives = {}
+    for cluster in db["downvote_clusters"].find(
+        {"build_id": meta["build_id"]}, {"representative": 1, "member_keys": 1}
+    ):
+        for key in cluster["member_keys"]:
+            representatives[key] = cluster["representative"]
+    return representatives
+
+def _pattern_question(representatives, question):
+    return representatives.get(normalize_question(question), question)
+
+def learn_from_votes(db, events):
+    """Re-learn the questions in a flushed batch whose 👎 total has reached the threshold"""
+    downvoted = {normalize_question(e["question"]): e["question"] for e in events if e["feedback"] == "👎"}
+    if not downvoted:
+        return []
+    over_threshold = db["feedback_counters"].find(
+        {"scope": "question", "question_key": {"$in": list(downvoted)}, "user": None,
+         "down": {"$gte": DOWNVOTE_THRESHOLD}},
+        {"question_key": 1}
+    )
+    over = [downvoted[doc["question_key"]] for doc in over_threshold]
+    if not over:
+        return []
+    representatives = cluster_representatives(db)
+    learned = list(dict.fromkeys(_pattern_question(representatives, question) for question in over))
+    learn_questions(db, learned)
+    return learned
+
+def rebuild_patterns(db):
+    """Re-learn every question with 10+ bad feedbacks; returns the number of patterns written"""
+    representatives = cluster_representatives(db)
+    ops = [
+        _pattern_update(row["_id"], row["responses"])
+        for row in _bad_response_samples(db, {}, DOWNVOTE_THRESHOLD)
+        # Clustered duplicates are covered by their representative's pattern
+        if _pattern_question(representatives, row["_id"]) == row["_id"]
+    ]
+    if ops:
+        db["blocked_patterns"].bulk_write(ops, ordered=False)
+    return len(ops)
+
+class PatternRebuilder:
+    """Background thread running `rebuild_patterns` on an interval or on request."""
+
+    def __init__(self, db, interval=REBUILD_INTERVAL_S, on_rebuild=None):
+        self.db = db
+        self.interval = interval
+        self.on_rebuild = on_rebuild
+        self.last_rebuild = None
+        self.last_count = 0
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, name="pattern-rebuilder", daemon=True).start()
+
+    def request_rebuild(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.last_count = rebuild_patterns(self.db)
+                self.last_rebuild = datetime.datetime.utcnow()
+                if self.on_rebuild:
+                    self.on_rebuild()
+            except Exception as exc:
+                logger.warning("Pattern rebuild failed: %s", exc)
+
+__all__ = [
+    "learn_question", "learn_questions", "cluster_representatives", "learn_from_votes", "rebuild_patterns",
+    "PatternRebuilder",
+]
@@ -1,28 +1,47 @@
-from langchain.vectorstores import Chroma
-from langchain.embeddings import OllamaEmbeddings
-from langchain.chat_models import ChatOllama
 from langchain.prompts import PromptTemplate
+from ollama_pool import PooledChatOllama, chat_pool
+from embedding_provider import get_embedding_provider
+from vector_snapshot import SnapshotStore
+from store_meta import open_chroma, read_store_meta
+from context_assembly import assemble_context
+from langchain.schema import Document
+from cache_tier import cache, key_digest
+from array import array
 import os
+import time
 
-# === Load Embeddings and LLM ===
-embedding = OllamaEmbeddings(model="nomic-embed-text")
-llm = ChatOllama(
+# === Load Embeddings and LLM (spread over the configured Ollama endpoints) ===
+embedding = get_embedding_provider()  # matches how the stores were embedded, or EMBEDDING_PROVIDER=hashing offline
+llm = PooledChatOllama(
+    chat_pool,
     model="llama3:instruct",
     temperature=0.3,
     num_predict=256,
     stream=True
 )
-
-# === Connect to BOTH ChromaDBs ===
-vectorstore_counsel = Chroma(
-    persist_directory="chroma_db",  # CounselChat dataset
-    embedding_function=embedding
+# Smaller local model for greetings, acknowledgements and other low-complexity turns
+llm_small = PooledChatOllama(
+    chat_pool,
+    model=os.environ.get("SMALL_CHAT_MODEL", "llama3.2:1b"),
+    temperature=0.3,
+    num_predict=96,
+    stream=True
 )
+llms = {"large": llm, "small": llm_small}
 
-vectorstore_empathy = Chroma(
-    persist_directory="chroma_db_empathy",  # EmpatheticDialogues dataset
-    embedding_function=embedding
-)
+# === Connect to BOTH vector stores ===
+def open_store(persist_directory, snapshot_env):
+    """Chroma by default; a memory-mapped snapshot when `snapshot_env` names one (fast replica start).
+
+    Either way the store must have been embedded with the configured provider's version.
+    """
+    snapshot_dir = os.environ.get(snapshot_env)
+    if snapshot_dir:
+        return SnapshotStore(snapshot_dir, embedding_function=embedding, expected_version=embedding.version)
+    return open_chroma(persist_directory, embedding)
+
+vectorstore_counsel = open_store("chroma_db", "COUNSEL_SNAPSHOT")           # CounselChat dataset
+vectorstore_empathy = open_store("chroma_db_empathy", "EMPATHY_SNAPSHOT")   # EmpatheticDialogues dataset
 
 # === Load Prompt ===
 with open("templates/empathetic_prompt.txt") as f:
@@ -33,13 +52,130 @@ prompt = PromptTemplate(
     template=template_text
 )
 
+# === Cache Versioning (a model, template or data change simply misses old entries) ===
+EMBEDDING_TTL_S = 7 * 24 * 3600
+RETRIEVAL_TTL_S = 3600
+ANSWER_TTL_S = 3600
+STORE_VERSION_TTL_S = 60.0   # how stale a Chroma store's ingest stamp may be after an ingest
+TEMPLATE_VERSION = key_digest(template_text)
+_store_versions = {}
+
+def store_version(vectorstore):
+    """The snapshot id, or for Chroma the ingest id in its store_meta.json (re-read at most once a minute).
+
+    Every ingest script stamps a new id after writing, so an edit or re-embed
+    that keeps the document count still changes the version.
+    """
+    if isinstance(vectorstore, SnapshotStore):
+        return vectorstore.snapshot_id
+    now = time.monotonic()
+    cached = _store_versions.get(id(vectorstore))
+    if cached and cached[1] > now:
+        return cached[0]
+    meta = read_store_meta(vectorstore._persist_directory)
+    version = f"{vectorstore._collection.name}:{meta.get('ingest_id', 'unstamped')}"
+    _store_versions[id(vectorstore)] = (version, now + STORE_VERSION_TTL_S)
+    return version
+
+# === Retrieval + Generation Steps ===
+def embed_query(text):
+    """Embed a query once so both stores can be searched with the same vector."""
+    key = key_digest(embedding.version, text)
+    vector = cache.get("embedding", key)
+    if vector is None:
+        vector = embedding.embed_query(text)
+        cache.set("embedding", key, list(vector), EMBEDDING_TTL_S)
+    return vector
+
+def search_store(vectorstore, query_vector, k):
+    """Return (Document, distance) pairs for a precomputed query vector."""
+    return vectorstore.similarity_search_by_vector_with_relevance_scores(query_vector, k=k)
+
+def _search_with_vectors(vectorstore, query_vector, k):
+    if isinstance(vectorstore, SnapshotStore):
+        return vectorstore.search_with_vectors(query_vector, k)
+    result = vectorstore._collection.query(
+        query_embeddings=[query_vector], n_results=k,
+        include=["documents", "metadatas", "distances", "embeddings"],
+    )
+    return [
+        (Document(page_content=text, metadata=metadata or {}), distance, vector)
+        for text, metadata, distance, vector in zip(
+            result["documents"][0], result["metadatas"][0], result["distances"][0], result["embeddings"][0]
+        )
+    ]
+
+def search_store_with_vectors(vectorstore, query_vector, k):
+    """(Document, distance, vector) triples, so later stages can compare hits without re-embedding."""
+    key = key_digest(embedding.version, store_version(vectorstore), k, array("f", query_vector).tobytes())
+    cached = cache.get("retrieval", key)
+    if cached is not None:
+        return [(Document(page_content=text, metadata=metadata), distance, vector) for text, metadata, distance, vector in cached]
+    hits = _search_with_vectors(vectorstore, query_vector, k)
+    cache.set("retrieval", key, [
+        [doc.page_content, doc.metadata, float(distance), [float(x) for x in vector]] for doc, distance, vector in hits
+    ], RETRIEVAL_TTL_S)
+    return hits
+
+def build_prompt(question, docs):
+    return prompt.format(context="\n\n".join(doc.page_content for doc in docs), question=question)
+
+def answer_key(question, docs, route="large"):
+    """Answer-cache key; the prompt holds the retrieved passages, so it already changes with the collections."""
+    return key_digest(llms[route].model, TEMPLATE_VERSION, build_prompt(question, docs))
+
+def cached_answer(key):
+    """A previously generated answer for `answer_key(...)`, or None."""
+    return cache.get("answer", key)
+
+def forget_answer(key):
+    """Stop serving a cached answer (called when it is rated 👎)."""
+    cache.delete("answer", key)
+
+def generate_answer(question, docs, route="large", trace=None):
+    """Stream the answer and cache it; if `trace` is a dict, prompt build, time to first token and tokens/sec go into it.
+
+    Callers look in the cache first (`cached_answer`), so a hit never waits for a generation slot.
+    """
+    build_start = time.perf_counter()
+    final_prompt = build_prompt(question, docs)
+    llm_start = time.perf_counter()
+    key = key_digest(llms[route].model, TEMPLATE_VERSION, final_prompt)
+
+    first_token_at = None
+    chunks = []
+    for chunk in llms[route].stream(final_prompt):
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        chunks.append(chunk.content)
+    end = time.perf_counter()
+
+    if trace is not None:
+        trace["prompt_build"] = llm_start - build_start
+        if first_token_at is not None:
+            trace["llm_ttft"] = first_token_at - llm_start
+            trace["tokens"] = len(chunks)  # Ollama streams roughly one token per chunk
+            if end > first_token_at:
+                trace["tokens_per_sec"] = len(chunks) / (end - first_token_at)
+    answer = "".join(chunks)
+    cache.set("answer", key, answer, ANSWER_TTL_S)
+    return answer
+
 # === Combined Retrieval + Response Function ===
-def combined_qa_run(query, k_each=1):
-    docs_counsel = vectorstore_counsel.similarity_search(query, k=k_each)
-    docs_empathy = vectorstore_empathy.similarity_search(query, k=k_each)
+CANDIDATES_PER_STORE = 6   # over-fetched; context assembly keeps the few that add something
 
-    combined_context = "\n\n".join(doc.page_content for doc in (docs_counsel + docs_empathy))
-    final_prompt = prompt.format(context=combined_context, question=query)
-    return llm.invoke(final_prompt).content
+def combined_qa_run(query, k_each=CANDIDATES_PER_STORE):
+    query_vector = embed_query(query)
+    candidates = [
+        hit
+        for store in (vectorstore_counsel, vectorstore_empathy)
+        for hit in search_store_with_vectors(store, query_vector, k_each)
+    ]
+    docs = assemble_context(query_vector, candidates)
+    cached = cached_answer(answer_key(query, docs))
+    return cached if cached is not None else generate_answer(query, docs)
 
-__all__ = ["combined_qa_run", "vectorstore_counsel", "vectorstore_empathy"]
+__all__ = [
+    "combined_qa_run", "embed_query", "search_store", "search_store_with_vectors", "build_prompt",
+    "answer_key", "cached_answer", "forget_answer", "generate_answer", "vectorstore_counsel", "vectorstore_empathy",
+]
@@ -0,0 +1,50 @@
+"""Re-embed persisted Chroma directories with the configured embedding provider.
+
+Every collection's vectors are rewritten in place from its stored
+documents (ids, documents and metadata are kept), then store_meta.json is
+stamped with the provider's version so the app will open the store again.
+An interrupted run leaves the old stamp, so the store keeps being refused
+until the migration is run again to completion.
+
+    python src/reembed_store.py chroma_db chroma_db_empathy chroma_db_answers chroma_db_journal
+"""
+import argparse
+
+import chromadb
+
+from embedding_provider import PROVIDER, get_embedding_provider
+from store_meta import mark_ingest, stored_embedding_version, write_store_meta
+
+# === CONFIG ===
+PAGE_SIZE = 1000   # documents read and re-embedded per step
+
+def reembed_directory(persist_directory, embedding, page_size=PAGE_SIZE):
+    """Re-embed every collection under `persist_directory`; returns the number of vectors rewritten."""
+    client = chromadb.PersistentClient(path=str(persist_directory))
+    rewritten = 0
+    for listed in client.list_collections():
+        # chromadb < 0.6 lists Collection objects, newer versions list names
+        collection = client.get_collection(listed if isinstance(listed, str) else listed.name)
+        for offset in range(0, collection.count(), page_size):
+            page = collection.get(include=["documents"], limit=page_size, offset=offset)
+            if page["ids"]:
+                collection.update(ids=page["ids"], embeddings=embedding.embed_documents(page["documents"]))
+                rewritten += len(page["ids"])
+    write_store_meta(persist_directory, embedding_version=embedding.version)
+    mark_ingest(persist_directory)
+    return rewritten
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed Chroma stores with the configured embedding provider")
+    parser.add_argument("persist_directories", nargs="+")
+    args = parser.parse_args()
+
+    # "auto" would pick the provider the stores already have; migrating means moving to batched /api/embed
+    embedding = get_embedding_provider("ollama" if PROVIDER == "auto" else PROVIDER)
+    for directory in args.persist_directories:
+        before = stored_embedding_version(directory)
+        if before == embedding.version:
+            print(f"✅ {directory} is already embedded as {embedding.version}")
+            continue
+        count = reembed_directory(directory, embedding)
+        print(f"✅ Re-embedded {count} vectors in {directory}: {before} -> {embedding.version}")
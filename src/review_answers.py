@@ -0,0 +1,45 @@
+"""Human review of precomputed answers before they can be served.
+
+Walks the clusters of the current store version that passed the automatic
+checks and are still unreviewed, shows the representative questions and
+the generated answer, and records approve / reject. Only approved answers
+are ever returned by answer_store.lookup_precomputed.
+
+    python src/review_answers.py --reviewer alice
+"""
+import argparse
+from collections import defaultdict
+
+from answer_store import STORE_VERSION, answer_store, set_review
+
+parser = argparse.ArgumentParser(description="Approve or reject precomputed answers")
+parser.add_argument("--reviewer", required=True, help="recorded with each decision")
+args = parser.parse_args()
+
+entries = answer_store._collection.get(
+    where={"$and": [{"store_version": STORE_VERSION}, {"vetted": True}, {"reviewed": False}]},
+    include=["documents", "metadatas"],
+)
+clusters = defaultdict(lambda: {"questions": [], "answer": "", "flagged": None})
+for question, metadata in zip(entries["documents"], entries["metadatas"]):
+    cluster = clusters[metadata["cluster_id"]]
+    cluster["questions"].append(question)
+    cluster["answer"] = metadata["answer"]
+    cluster["flagged"] = metadata.get("flagged")
+
+print(f"📝 {len(clusters)} clusters awaiting review for version {STORE_VERSION}.")
+for cluster_id, cluster in sorted(clusters.items()):
+    print("\n" + "=" * 80)
+    for question in cluster["questions"][:3]:
+        print(f"❓ {question[:200]}")
+    print(f"\n💬 {cluster['answer']}\n")
+    if cluster["flagged"]:
+        print(f"🚩 Flagged after serving: {cluster['flagged']}\n")
+    choice = ""
+    while choice not in ("a", "r", "s", "q"):
+        choice = input("[a]pprove, [r]eject, [s]kip, [q]uit: ").strip().lower()
+    if choice == "q":
+        break
+    if choice in ("a", "r"):
+        updated = set_review(cluster_id, approved=choice == "a", reviewer=args.reviewer)
+        print(f"{'✅ Approved' if choice == 'a' else '🚫 Rejected'} ({updated} questions).")
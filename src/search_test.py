@@ -1,10 +1,10 @@
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain.vectorstores import Chroma
+from embedding_provider import get_embedding_provider
+from store_meta import open_chroma
 
-embedding = OllamaEmbeddings(model="nomic-embed-text")
+embedding = get_embedding_provider()
 
 # Load the existing Chroma DB
-vectorstore = Chroma(persist_directory="chroma_db", embedding_function=embedding)
+vectorstore = open_chroma("chroma_db", embedding)
 
 query = "I'm feeling anxious and overwhelmed."
 results = vectorstore.similarity_search(query, k=2)
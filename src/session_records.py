@@ -0,0 +1,52 @@
+"""Compact records for what the chat page keeps in st.session_state.
+
+Retrieved hits, messages and pending feedback are slotted objects rather
+than LangChain Documents and dicts, so each costs a few fixed fields
+instead of a per-instance dict. Their text goes through `intern_text`, so
+a passage retrieved by many sessions, or a canned reply shown to all of
+them, is held once per process; CPython frees an interned string once no
+record refers to it any more.
+"""
+import hashlib
+import sys
+
+def intern_text(text):
+    return sys.intern(text) if text else ""
+
+def text_id(text):
+    """Short stable id for a passage (the stores' own ids are not returned with hits)."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+class RetrievedHit:
+    __slots__ = ("doc_id", "score", "text")
+
+    def __init__(self, doc_id, score, text):
+        self.doc_id = doc_id
+        self.score = score
+        self.text = intern_text(text)
+
+    @classmethod
+    def from_document(cls, doc, distance):
+        return cls(text_id(doc.page_content), float(distance), doc.page_content)
+
+class Message:
+    __slots__ = ("id", "role", "content", "time")
+
+    def __init__(self, role, content, time, id=None):
+        self.id = id
+        self.role = role
+        self.content = intern_text(content)
+        self.time = time
+
+class PendingFeedback:
+    __slots__ = ("question", "response", "route", "answer_key", "cluster_id", "submitted")
+
+    def __init__(self, question, response, route, answer_key=None, cluster_id=None):
+        self.question = intern_text(question)
+        self.response = intern_text(response)
+        self.route = route
+        self.answer_key = answer_key   # answer-cache entry to drop if the response is rated 👎
+        self.cluster_id = cluster_id   # precomputed answer to send back for review if rated 👎
+        self.submitted = False
+
+__all__ = ["RetrievedHit", "Message", "PendingFeedback", "intern_text"]
@@ -0,0 +1,95 @@
+"""Per-session retrieval state for follow-up turns.
+
+Consecutive turns in a chat are usually about the same thing, so each
+session keeps a running topic embedding (an exponential moving average of
+its question vectors) and the candidate pool fetched for that topic. A
+question close to the topic is answered by re-ranking the pool locally
+against a blend of the question and the topic, which costs two small
+matrix products instead of two store searches and keeps follow-ups such as
+"what else can I try?" anchored to the conversation. A topic shift, an
+empty pool or a pool that has served MAX_LOCAL_TURNS turns goes back to
+the full stores.
+
+The pool is compact: per store, one float32 matrix of candidate vectors and
+the candidates' interned texts (so a passage held by many sessions is
+stored once); Documents are only rebuilt for the hits a turn returns.
+Distances are the stores' own squared L2. The search vector is scaled to
+the question's norm, so they come out on the same scale as a store search
+with the question itself, whether the store holds unit-length vectors or
+not.
+"""
+import numpy as np
+from langchain.schema import Document
+
+from session_records import intern_text
+
+# === CONFIG ===
+POOL_PER_STORE = 20           # candidates cached per store on a full fetch
+TOPIC_SIMILARITY = 0.75       # cosine to the topic below which the turn counts as a topic shift
+QUESTION_WEIGHT = 0.7         # share of the latest question in the re-ranking query
+TOPIC_DECAY = 0.6             # share of the old topic kept after each turn
+MAX_LOCAL_TURNS = 4           # refresh the pool after this many local re-ranks
+
+def _unit(vector):
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+class StorePool:
+    """One store's cached candidates: a float32 vector matrix and row-aligned interned texts.
+
+    Hit metadata is not kept; nothing downstream of retrieval reads it.
+    """
+    __slots__ = ("vectors", "texts")
+
+    def __init__(self, hits):
+        self.texts = [intern_text(doc.page_content) for doc, _, _ in hits]
+        self.vectors = np.asarray([vector for _, _, vector in hits], dtype=np.float32) if hits else np.empty((0, 0), np.float32)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def rerank(self, query_vector, k):
+        """The k nearest cached candidates as (Document, squared-L2 distance, vector) triples."""
+        if not self.texts:
+            return []
+        distances = np.sum((self.vectors - query_vector) ** 2, axis=1)
+        order = np.argsort(distances)[:k]
+        return [(Document(page_content=self.texts[i]), float(distances[i]), self.vectors[i]) for i in order]
+
+class SessionRetrieval:
+    def __init__(self):
+        self.topic = None
+        self._pool = (StorePool([]), StorePool([]))   # (counsel, empathy)
+        self._local_turns = 0
+
+    def retrieve(self, query_vector, fetch, k):
+        """Return (counsel hits, empathy hits, "local" | "full") for this turn.
+
+        `fetch(vector, n)` searches both stores and returns their (Document,
+        distance, vector) hit lists; it is only called when the pool is refreshed.
+        """
+        raw = np.asarray(query_vector, dtype=np.float32)
+        question = _unit(raw)
+        on_topic = self.topic is not None and float(question @ self.topic) >= TOPIC_SIMILARITY
+        if on_topic:
+            search_vector = _unit(QUESTION_WEIGHT * question + (1 - QUESTION_WEIGHT) * self.topic)
+            self.topic = _unit(TOPIC_DECAY * self.topic + (1 - TOPIC_DECAY) * question)
+        else:
+            search_vector = question
+            self.topic = question
+
+        # Back to the question's own length, so squared-L2 distances match a store search with it
+        search_vector = search_vector * np.linalg.norm(raw)
+
+        if on_topic and any(len(pool) for pool in self._pool) and self._local_turns < MAX_LOCAL_TURNS:
+            self._local_turns += 1
+            mode = "local"
+        else:
+            self._pool = tuple(StorePool(hits) for hits in fetch(search_vector.tolist(), POOL_PER_STORE))
+            self._local_turns = 0
+            mode = "full"
+        hits_counsel, hits_empathy = (pool.rerank(search_vector, k) for pool in self._pool)
+        return hits_counsel, hits_empathy, mode
+
+__all__ = ["SessionRetrieval"]
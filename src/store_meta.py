@@ -0,0 +1,95 @@
+"""Which embedding version built a persisted vector store.
+
+Each Chroma persist directory carries a store_meta.json next to its data:
+
+    {"embedding_version": "ollama:nomic-embed-text:unit", "ingest_id": "…", "ingested_at": "…"}
+
+An embedding version is "<provider>:<model>:<unit|raw>"; the last part says
+whether vectors are unit length (/api/embed, hashing) or not (the old
+per-text /api/embeddings). Squared-L2 rankings differ between the two, so
+`open_chroma` refuses to open a store whose version does not match the
+configured provider; cosine stores only need the provider and model to
+match. Stores from before this file existed carry no stamp and are taken to
+be UNSTAMPED_VERSION, which is how the shipped chroma_db* directories were
+built; the default "auto" provider serves them with ollama-legacy until
+reembed_store.py has re-embedded them.
+
+Ingest scripts call `mark_ingest` after changing a store's contents; the
+new ingest_id is the store's content version for the retrieval cache.
+
+The stamps are kept in a sidecar file rather than Chroma's collection
+metadata: re-opening a collection with `collection_metadata` overwrites
+that metadata, and `modify` cannot carry the hnsw:space key.
+"""
+import datetime
+import json
+import uuid
+from pathlib import Path
+
+# === CONFIG ===
+META_FILE = "store_meta.json"
+UNSTAMPED_VERSION = "ollama:nomic-embed-text:raw"
+
+class EmbeddingVersionMismatch(ValueError):
+    pass
+
+def read_store_meta(persist_directory):
+    path = Path(persist_directory) / META_FILE
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+def write_store_meta(persist_directory, **fields):
+    """Merge `fields` into the directory's store_meta.json (atomically)."""
+    directory = Path(persist_directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    meta = {**read_store_meta(directory), **fields}
+    tmp = directory / (META_FILE + ".tmp")
+    tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    tmp.replace(directory / META_FILE)
+    return meta
+
+def _has_data(directory):
+    return directory.exists() and any(path.name != META_FILE for path in directory.iterdir())
+
+def stored_embedding_version(persist_directory):
+    """The version a store was built with; None for a store that does not exist yet."""
+    version = read_store_meta(persist_directory).get("embedding_version")
+    if version is None and _has_data(Path(persist_directory)):
+        return UNSTAMPED_VERSION
+    return version
+
+def compatible(stored, current, space="l2"):
+    if space == "cosine":
+        return stored.rsplit(":", 1)[0] == current.rsplit(":", 1)[0]
+    return stored == current
+
+def check_embedding_version(persist_directory, embedding, space="l2"):
+    """Stamp a new store with `embedding`'s version, or raise if an existing one was built differently."""
+    stored = stored_embedding_version(persist_directory)
+    if stored is None:
+        write_store_meta(persist_directory, embedding_version=embedding.version)
+        return
+    if not compatible(stored, embedding.version, space):
+        raise EmbeddingVersionMismatch(
+            f"{persist_directory} was embedded as {stored}, but the configured provider embeds as "
+            f"{embedding.version}. Re-embed it with `python src/reembed_store.py {persist_directory}` "
+            f"or set EMBEDDING_PROVIDER to match."
+        )
+
+def mark_ingest(persist_directory):
+    """Record that the store's contents changed; returns the new ingest id."""
+    ingest_id = uuid.uuid4().hex[:16]
+    write_store_meta(persist_directory, ingest_id=ingest_id, ingested_at=datetime.datetime.utcnow().isoformat())
+    return ingest_id
+
+def open_chroma(persist_directory, embedding, **kwargs):
+    """A LangChain Chroma store, after checking it was built with `embedding`'s version."""
+    from langchain.vectorstores import Chroma
+
+    space = (kwargs.get("collection_metadata") or {}).get("hnsw:space", "l2")
+    check_embedding_version(persist_directory, embedding, space)
+    return Chroma(persist_directory=str(persist_directory), embedding_function=embedding, **kwargs)
+
+__all__ = [
+    "UNSTAMPED_VERSION", "EmbeddingVersionMismatch", "read_store_meta", "write_store_meta",
+    "stored_embedding_version", "check_embedding_version", "mark_ingest", "open_chroma",
+]
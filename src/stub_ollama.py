@@ -0,0 +1,101 @@
+"""Minimal stand-in for an Ollama server, for local pool and load testing.
+
+Implements /api/tags, /api/embeddings, /api/embed, /api/chat and
+/api/generate with configurable latency. Embeddings are deterministic
+(hash-seeded) so repeated texts always get the same vector.
+
+    python src/stub_ollama.py --port 11500 --latency 0.05
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_REPLY = "I hear you, and it makes sense to feel this way. You're not alone in this."
+
+def stub_embedding(text, dim):
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+
+def make_handler(latency, token_latency, dim):
+    class StubOllamaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": [{"name": "stub"}]})
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency)
+
+            if self.path == "/api/embeddings":
+                self._send_json({"embedding": stub_embedding(request.get("prompt", ""), dim)})
+            elif self.path == "/api/embed":
+                inputs = request.get("input", [])
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                self._send_json({"model": request.get("model"), "embeddings": [stub_embedding(t, dim) for t in inputs]})
+            elif self.path in ("/api/chat", "/api/generate"):
+                self._stream_reply(request, chat=self.path == "/api/chat")
+            else:
+                self.send_error(404)
+
+        def _stream_reply(self, request, chat):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            words = STUB_REPLY.split(" ")
+            for i, word in enumerate(words):
+                time.sleep(token_latency)
+                piece = word if i == 0 else " " + word
+                chunk = {"message": {"role": "assistant", "content": piece}} if chat else {"response": piece}
+                self._write_chunk({**chunk, "model": request.get("model"), "done": False})
+            final = {"message": {"role": "assistant", "content": ""}} if chat else {"response": ""}
+            self._write_chunk({**final, "model": request.get("model"), "done": True, "eval_count": len(words)})
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, payload):
+            data = (json.dumps(payload) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return StubOllamaHandler
+
+def start_stub_server(port=0, latency=0.0, token_latency=0.0, dim=768):
+    """Start a stub server on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, token_latency, dim))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-ollama", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a stub Ollama server")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response starts")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed tokens")
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, args.latency, args.token_latency, args.dim)
+    print(f"🧪 Stub Ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
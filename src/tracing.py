@@ -0,0 +1,184 @@
+"""Per-request stage traces for the RAG path, exported as JSONL and Prometheus text.
+
+A trace is the flat dict of stage -> seconds that the turn pipeline already
+fills in (crisis check, Mongo lookups, query embedding, each store search,
+prompt build, LLM time to first token, generation, total) plus a few tags
+such as the model route and tokens/sec. Recent traces are kept in memory
+for the sidebar's p50/p95 panel and the summary quantiles, while each
+stage's _sum/_count are kept as lifetime totals as Prometheus expects.
+
+Requests only enqueue their trace. A background writer appends them to
+metrics/traces.jsonl, rotating it at TRACES_MAX_BYTES (keeping
+TRACES_BACKUPS old files), and rewrites the Prometheus textfile-collector
+snapshot at most every PROM_WRITE_INTERVAL_S. If the writer falls
+TRACE_QUEUE_MAX traces behind, new traces are counted and dropped from
+the file rather than slowing requests down.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+# === CONFIG ===
+METRICS_DIR = Path("metrics")
+TRACES_PATH = METRICS_DIR / "traces.jsonl"
+PROM_PATH = METRICS_DIR / "rag.prom"
+WINDOW = 1000
+PROM_WRITE_INTERVAL_S = 10.0
+TRACES_MAX_BYTES = 50 * 1024 * 1024
+TRACES_BACKUPS = 3
+TRACE_QUEUE_MAX = 10000
+WRITE_BATCH = 500
+TAG_FIELDS = ("route", "degraded", "blocked", "retrieval", "tokens")   # non-timing fields carried on a trace
+RATE_FIELDS = ("tokens_per_sec",)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_recent = deque(maxlen=WINDOW)
+_totals = {"traces": 0, "dropped": 0}
+_stage_totals = {}   # stage -> [sum, count] since process start
+_last_prom_write = 0.0
+_queue = queue.Queue(maxsize=TRACE_QUEUE_MAX)
+_writer = None
+
+def _percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+def _stage_values(trace):
+    for stage, value in trace.items():
+        if stage in TAG_FIELDS or stage == "ts" or isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        yield stage, value
+
+def _stage_samples():
+    """Sorted numeric samples per stage over the recent window, plus lifetime totals."""
+    with _lock:
+        traces = list(_recent)
+        totals = dict(_totals)
+        stage_totals = {stage: tuple(pair) for stage, pair in _stage_totals.items()}
+    samples = {}
+    for trace in traces:
+        for stage, value in _stage_values(trace):
+            samples.setdefault(stage, []).append(value)
+    for values in samples.values():
+        values.sort()
+    return samples, totals, stage_totals
+
+def _rotate(path):
+    if not path.exists() or path.stat().st_size < TRACES_MAX_BYTES:
+        return
+    for i in range(TRACES_BACKUPS - 1, 0, -1):
+        older = path.with_name(f"{path.name}.{i}")
+        if older.exists():
+            older.replace(path.with_name(f"{path.name}.{i + 1}"))
+    path.replace(path.with_name(f"{path.name}.1"))
+
+def _write_traces():
+    global _last_prom_write
+    while True:
+        lines = [_queue.get()]
+        while len(lines) < WRITE_BATCH:
+            try:
+                lines.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            METRICS_DIR.mkdir(exist_ok=True)
+            _rotate(TRACES_PATH)
+            with TRACES_PATH.open("a", encoding="utf-8") as f:
+                f.write("".join(lines))
+            if time.monotonic() - _last_prom_write >= PROM_WRITE_INTERVAL_S:
+                _last_prom_write = time.monotonic()
+                write_prometheus(PROM_PATH)
+        except OSError as exc:
+            logger.warning("Writing traces failed: %s", exc)
+        finally:
+            for _ in lines:
+                _queue.task_done()
+
+def _ensure_writer():
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_traces, name="trace-writer", daemon=True)
+            _writer.start()
+
+def flush_traces():
+    """Block until every queued trace has been written (used at exit and in tests)."""
+    if _writer is not None:
+        _queue.join()
+
+atexit.register(flush_traces)
+
+def record_trace(trace):
+    """Store one finished trace and queue it for export."""
+    trace = {**trace, "ts": time.time()}
+    with _lock:
+        _recent.append(trace)
+        _totals["traces"] += 1
+        for stage, value in _stage_values(trace):
+            pair = _stage_totals.setdefault(stage, [0.0, 0])
+            pair[0] += value
+            pair[1] += 1
+    _ensure_writer()
+    try:
+        _queue.put_nowait(json.dumps(trace, default=str) + "\n")
+    except queue.Full:
+        with _lock:
+            _totals["dropped"] += 1
+
+def stage_percentiles():
+    """{stage: {"p50_ms", "p95_ms", "count"}} over the recent window (tokens/sec unscaled)."""
+    samples, _, _ = _stage_samples()
+    stats = {}
+    for stage, values in samples.items():
+        if stage in RATE_FIELDS:
+            stats[stage] = {"p50": round(_percentile(values, 0.50), 1), "p95": round(_percentile(values, 0.95), 1), "count": len(values)}
+        else:
+            stats[stage] = {"p50_ms": round(_percentile(values, 0.50) * 1000, 1), "p95_ms": round(_percentile(values, 0.95) * 1000, 1), "count": len(values)}
+    return stats
+
+def _summary_lines(metric, label, values, totals):
+    """Quantiles over the recent window; _sum/_count are the lifetime `totals` so rate() works."""
+    selector = f"{{{label}}}" if label else ""
+    quantile_prefix = f"{label}," if label else ""
+    lines = [f'{metric}{{{quantile_prefix}quantile="{q}"}} {_percentile(values, q):.6f}' for q in (0.5, 0.95, 0.99)]
+    lines.append(f"{metric}_sum{selector} {totals[0]:.6f}")
+    lines.append(f"{metric}_count{selector} {totals[1]}")
+    return lines
+
+def prometheus_text():
+    samples, totals, stage_totals = _stage_samples()
+    lines = [
+        "# HELP rag_stage_seconds Per-stage latency of the chat RAG path over recent requests.",
+        "# TYPE rag_stage_seconds summary",
+    ]
+    for stage, values in sorted(samples.items()):
+        if stage not in RATE_FIELDS:
+            lines += _summary_lines("rag_stage_seconds", f'stage="{stage}"', values, stage_totals[stage])
+    for stage in RATE_FIELDS:
+        if stage in samples:
+            lines += ["# HELP rag_llm_tokens_per_second Generation throughput.", "# TYPE rag_llm_tokens_per_second summary"]
+            lines += _summary_lines("rag_llm_tokens_per_second", "", samples[stage], stage_totals[stage])
+    lines += ["# HELP rag_traces_total Traces recorded since process start.", "# TYPE rag_traces_total counter", f"rag_traces_total {totals['traces']}"]
+    lines += [
+        "# HELP rag_traces_dropped_total Traces not written to traces.jsonl because the writer fell behind.",
+        "# TYPE rag_traces_dropped_total counter",
+        f"rag_traces_dropped_total {totals['dropped']}",
+    ]
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path=PROM_PATH):
+    """Atomically rewrite the textfile-collector snapshot."""
+    path = Path(path)
+    path.parent.mkdir(exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(prometheus_text(), encoding="utf-8")
+    tmp.replace(path)
+
+__all__ = ["record_trace", "flush_traces", "stage_percentiles", "prometheus_text", "write_prometheus"]
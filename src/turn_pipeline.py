@@ -0,0 +1,180 @@
+"""Per-turn preparation for the chat page.
+
+The Mongo lookups (block check, guidance, summary) and the retrieval steps
+do not depend on each other, so they run on a shared thread pool and
+generation starts as soon as everything it needs has arrived.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rag_chain import (
+    embed_query, search_store_with_vectors, answer_key, cached_answer, forget_answer, generate_answer,
+    vectorstore_counsel, vectorstore_empathy, CANDIDATES_PER_STORE,
+)
+from context_assembly import assemble_context
+from answer_cache import answer_cache
+from load_shedding import generation_gate, degraded_answer
+from model_router import route_features, choose_route, route_metrics
+from answer_store import flag_for_review, lookup_precomputed
+from journal_search import journal_context, search_by_vector
+from feedback_counters import is_question_blocked
+from tracing import record_trace
+from session_records import RetrievedHit
+
+# === CONFIG ===
+TURN_WORKERS = 16
+K_DISPLAY = 2   # docs per store shown in the "Retrieved for" expander and used for routing
+
+# Process-wide pool: Streamlit reruns re-import nothing, so every session shares it
+executor = ThreadPoolExecutor(max_workers=TURN_WORKERS, thread_name_prefix="turn")
+
+def _timed(timings, name, fn, *args):
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        timings[name] = time.perf_counter() - start
+
+def run_turn(question, is_blocked, get_guidance, get_summary, build_query, user_id=None, turn_count=0,
+             is_blocked_near=None, search_journal=None, retrieval=None, timings=None):
+    """Run one chat turn and return a dict with the response, retrieved docs and per-step timings.
+
+    `is_blocked`, `get_guidance` and `get_summary` are zero-argument callables doing
+    the Mongo lookups; `build_query(summary, guidance)` builds the text sent to the LLM.
+    `is_blocked_near(query_vector)` optionally blocks paraphrases of downvoted questions;
+    `search_journal(query_vector)` optionally returns journal hits added to the context.
+    `retrieval` is the session's SessionRetrieval; with it, on-topic follow-ups are
+    re-ranked from the session's cached candidates instead of searching the stores
+    (`result["retrieval"]` says "local" or "full").
+    A previously generated answer for the same prompt is served from the answer
+    cache without entering the generation gate; `answer_key` identifies it so a
+    👎 can drop it (None for precomputed and degraded answers).
+    When generation is shed, misses its deadline or fails, `degraded` names the fallback used;
+    `route` says which model ("small" or "large") the turn was sent to, or
+    "precomputed" when a vetted offline answer was served directly, with its
+    `cluster_id` so a 👎 can send the cluster back for review.
+    `timings` may carry stages measured by the caller (e.g. the crisis check);
+    the finished timings are recorded as this request's trace.
+    """
+    timings = {} if timings is None else timings
+    turn_start = time.perf_counter()
+
+    blocked_f = executor.submit(_timed, timings, "block_check", is_blocked)
+    guidance_f = executor.submit(_timed, timings, "guidance", get_guidance)
+    summary_f = executor.submit(_timed, timings, "summary", get_summary)
+    embed_f = executor.submit(_timed, timings, "embed_query", embed_query, question)
+
+    query_vector = embed_f.result()
+    precomputed_f = executor.submit(_timed, timings, "precomputed_lookup", lookup_precomputed, query_vector)
+    journal_f = executor.submit(_timed, timings, "search_journal", search_journal, query_vector) if search_journal else None
+
+    result = {"blocked": False, "response": None, "degraded": None, "route": None, "retrieval": "full",
+              "answer_key": None, "cluster_id": None, "docs_counsel": [], "docs_empathy": [], "timings": timings}
+
+    # One query embedding serves both stores; each is over-fetched once, with vectors, for context assembly
+    def fetch(vector, k):
+        counsel_f = executor.submit(_timed, timings, "search_counsel", search_store_with_vectors, vectorstore_counsel, vector, k)
+        empathy_f = executor.submit(_timed, timings, "search_empathy", search_store_with_vectors, vectorstore_empathy, vector, k)
+        return counsel_f.result(), empathy_f.result()
+
+    if retrieval is not None:
+        hits_counsel, hits_empathy, result["retrieval"] = _timed(
+            timings, "retrieval", retrieval.retrieve, query_vector, fetch, CANDIDATES_PER_STORE
+        )
+    else:
+        hits_counsel, hits_empathy = fetch(query_vector, CANDIDATES_PER_STORE)
+
+    if blocked_f.result() or (is_blocked_near and _timed(timings, "semantic_block_check", is_blocked_near, query_vector)):
+        result["blocked"] = True
+        return _finish(result, turn_start)
+
+    # Slotted records with interned text; the page keeps these in session state
+    docs_counsel = [RetrievedHit.from_document(doc, distance) for doc, distance, _ in hits_counsel[:K_DISPLAY]]
+    docs_empathy = [RetrievedHit.from_document(doc, distance) for doc, distance, _ in hits_empathy[:K_DISPLAY]]
+    result["docs_counsel"] = docs_counsel
+    result["docs_empathy"] = docs_empathy
+
+    precomputed = precomputed_f.result()
+    if precomputed:
+        result["route"] = "precomputed"
+        result["response"], result["cluster_id"] = precomputed
+        return _finish(result, turn_start)
+
+    query = build_query(summary_f.result(), guidance_f.result())
+    context_docs = _timed(timings, "context_assembly", assemble_context, query_vector, hits_counsel + hits_empathy)
+    if journal_f:
+        context_docs += journal_context(journal_f.result())
+    distances = [distance for _, distance, _ in hits_counsel[:K_DISPLAY] + hits_empathy[:K_DISPLAY]]
+    route = choose_route(route_features(question, distances, turn_count))
+    result["route"] = route
+
+    key = answer_key(query, context_docs, route)
+    cached = _timed(timings, "answer_cache", cached_answer, key)
+    if cached is not None:
+        result["response"], result["answer_key"] = cached, key
+        return _finish(result, turn_start)
+
+    response, shed_reason = _timed(timings, "generation", generation_gate.run, generate_answer, query, context_docs, route, timings)
+    if shed_reason:
+        response, result["degraded"] = degraded_answer(user_id, query_vector, docs_counsel)
+    else:
+        route_metrics.record_latency(route, timings["generation"])
+        answer_cache.add(user_id, query_vector, response)
+        result["answer_key"] = key
+    result["response"] = response
+    return _finish(result, turn_start)
+
+def retire_answer(user_id, response, key=None, cluster_id=None):
+    """After a 👎: stop serving `response` from the caches, or from the answer store until it is re-reviewed."""
+    if key:
+        forget_answer(key)
+    if cluster_id is not None:
+        flag_for_review(cluster_id, f"👎 from {user_id}")
+    answer_cache.discard(user_id, response)
+
+def _finish(result, turn_start):
+    timings = result["timings"]
+    timings["total"] = time.perf_counter() - turn_start
+    record_trace({
+        **timings, "route": result["route"], "degraded": result["degraded"],
+        "blocked": result["blocked"], "retrieval": result["retrieval"],
+    })
+    return result
+
+# === Chat Page Turn ===
+def load_summary(db, user_id):
+    stored_summary_doc = db["user_summaries"].find_one({"user_id": user_id}) or {}
+    return stored_summary_doc.get("summary", "")
+
+def build_enhanced_query(query, guidance):
+    """Wrap the summary-prefixed question with guidance from past bad feedback"""
+    return f"""
+    {query}
+    
+    {guidance}
+    
+    Instructions: Provide an empathetic, personalized response. Avoid generic advice.
+    """
+
+def run_chat_turn(db, user_id, question, guidance_index, downvote_index, turn_count=0, retrieval=None, timings=None):
+    """The chat page's turn, wired to Mongo, learned guidance, downvote clusters and the journal.
+
+    Shared by pages/chat.py and load_test.py so the harness drives exactly the page's logic.
+    """
+    return run_turn(
+        question,
+        is_blocked=lambda: is_question_blocked(db, user_id, question),
+        get_guidance=lambda: guidance_index.guidance_for(question),
+        get_summary=lambda: load_summary(db, user_id),
+        build_query=lambda summary, guidance: build_enhanced_query(
+            f"User's Summary:\n{summary}\n\nUser's Question:\n{question}", guidance
+        ),
+        user_id=user_id,
+        turn_count=turn_count,
+        is_blocked_near=lambda query_vector: downvote_index.is_blocked(user_id, query_vector),
+        search_journal=lambda query_vector: search_by_vector(user_id, query_vector),
+        retrieval=retrieval,
+        timings=timings,
+    )
+
+__all__ = ["run_turn", "run_chat_turn", "retire_answer", "load_summary", "build_enhanced_query"]
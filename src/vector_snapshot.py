@@ -0,0 +1,252 @@
+"""Portable, compact snapshots of a vector collection.
+
+A snapshot is a directory holding:
+
+    vectors.npy     float16 matrix, one row per document (memory-mappable)
+    records.parquet id, text and JSON-encoded metadata, row-aligned with vectors
+    manifest.json   embedding model and version, dimension, count, distance space, snapshot id
+
+Exporting reads a persisted Chroma collection page by page; importing
+writes a snapshot back into a Chroma directory. A new replica does not have
+to do either: `SnapshotStore` serves searches straight from the memory-mapped
+matrix, and rag_chain opens one instead of Chroma when COUNSEL_SNAPSHOT /
+EMPATHY_SNAPSHOT point at a snapshot directory.
+
+    python src/vector_snapshot.py export chroma_db snapshots/counsel
+    python src/vector_snapshot.py import snapshots/counsel chroma_db
+"""
+import argparse
+import datetime
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from langchain.schema import Document
+
+from store_meta import UNSTAMPED_VERSION, EmbeddingVersionMismatch, compatible, mark_ingest, write_store_meta
+
+# === CONFIG ===
+FORMAT_VERSION = 1
+VECTORS_FILE = "vectors.npy"
+RECORDS_FILE = "records.parquet"
+MANIFEST_FILE = "manifest.json"
+EXPORT_PAGE = 5000      # documents read from Chroma per call
+SEARCH_CHUNK = 65536    # rows scored per matrix product, bounding float32 scratch memory
+
+def export_snapshot(vectorstore, out_dir, model, embedding_version):
+    """Write a Chroma collection to `out_dir`; returns the manifest."""
+    collection = vectorstore._collection
+    count = collection.count()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    vectors = None
+    ids, texts, metadatas = [], [], []
+    for offset in range(0, count, EXPORT_PAGE):
+        page = collection.get(include=["embeddings", "documents", "metadatas"], limit=EXPORT_PAGE, offset=offset)
+        block = np.asarray(page["embeddings"], dtype=np.float16)
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(out_dir / VECTORS_FILE, mode="w+", dtype=np.float16, shape=(count, block.shape[1]))
+        vectors[offset:offset + len(block)] = block
+        digest.update(block.tobytes())
+        digest.update("\n".join(page["ids"]).encode("utf-8"))
+        ids += page["ids"]
+        texts += page["documents"]
+        metadatas += [json.dumps(m or {}, ensure_ascii=False, default=str) for m in page["metadatas"]]
+    if vectors is None:
+        raise ValueError("Collection is empty; nothing to snapshot")
+    vectors.flush()
+    pd.DataFrame({"id": ids, "text": texts, "metadata": metadatas}).to_parquet(out_dir / RECORDS_FILE, index=False)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "model": model,
+        "embedding_version": embedding_version,
+        "dim": int(vectors.shape[1]),
+        "count": count,
+        "dtype": "float16",
+        "distance": (collection.metadata or {}).get("hnsw:space", "l2"),
+        "snapshot_id": digest.hexdigest()[:16],
+        "created_at": datetime.datetime.utcnow().isoformat(),
+    }
+    (out_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+def read_manifest(path):
+    manifest = json.loads((Path(path) / MANIFEST_FILE).read_text(encoding="utf-8"))
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format_version')} in {path}")
+    return manifest
+
+def _index_key(key, value):
+    # True == 1 in Python, but Chroma treats a bool and an int as different values
+    return key, type(value) is bool, value
+
+def _nearest(distances, k):
+    """Indices of the k smallest distances, nearest first, without sorting the whole array."""
+    if k <= 0 or len(distances) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(distances):
+        part = np.argpartition(distances, k - 1)[:k]
+    else:
+        part = np.arange(len(distances))
+    return part[np.argsort(distances[part], kind="stable")]
+
+class SnapshotStore:
+    """Read-only vector store over a memory-mapped snapshot.
+
+    Implements the search methods the app calls on Chroma, returning the
+    same distances (squared L2, or 1 - cosine for cosine collections).
+    """
+
+    def __init__(self, path, embedding_function=None, expected_version=None):
+        self.path = Path(path)
+        self.manifest = read_manifest(path)
+        if expected_version and not compatible(self.embedding_version, expected_version, self.manifest["distance"]):
+            raise EmbeddingVersionMismatch(f"Snapshot {path} was embedded as {self.embedding_version}, not {expected_version}")
+        self.embedding_function = embedding_function
+        self.vectors = np.load(self.path / VECTORS_FILE, mmap_mode="r")
+        records = pd.read_parquet(self.path / RECORDS_FILE)
+        self._ids = records["id"].tolist()
+        self._texts = records["text"].tolist()
+        self._metadatas = records["metadata"].tolist()   # decoded lazily, only for returned hits
+        self._sq_norms = None
+        self._metadata_rows = None   # (key, value) -> sorted row numbers, built on the first filtered search
+
+    @property
+    def snapshot_id(self):
+        return self.manifest["snapshot_id"]
+
+    @property
+    def embedding_version(self):
+        # Snapshots exported before versions were recorded came from the unstamped stores
+        return self.manifest.get("embedding_version", UNSTAMPED_VERSION)
+
+    def _squared_norms(self):
+        if self._sq_norms is None:
+            norms = np.empty(len(self.vectors), dtype=np.float32)
+            for start in range(0, len(self.vectors), SEARCH_CHUNK):
+                block = self.vectors[start:start + SEARCH_CHUNK].astype(np.float32)
+                norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+            self._sq_norms = norms
+        return self._sq_norms
+
+    def _distances(self, query):
+        distances = np.empty(len(self.vectors), dtype=np.float32)
+        cosine = self.manifest["distance"] == "cosine"
+        norms = self._squared_norms()
+        for start in range(0, len(self.vectors), SEARCH_CHUNK):
+            dots = self.vectors[start:start + SEARCH_CHUNK].astype(np.float32) @ query
+            block_norms = norms[start:start + len(dots)]
+            if cosine:
+                distances[start:start + len(dots)] = 1.0 - dots / (np.sqrt(block_norms) * (np.linalg.norm(query) or 1.0) + 1e-12)
+            else:
+                distances[start:start + len(dots)] = block_norms - 2.0 * dots + query @ query
+        return distances
+
+    def _document(self, row):
+        return Document(page_content=self._texts[row], metadata=json.loads(self._metadatas[row]))
+
+    def _index_metadata(self):
+        """Decode every row's metadata once into an inverted index of its scalar values."""
+        if self._metadata_rows is None:
+            rows = {}
+            for row, encoded in enumerate(self._metadatas):
+                for key, value in json.loads(encoded).items():
+                    if isinstance(value, (str, int, float, bool)):
+                        rows.setdefault(_index_key(key, value), []).append(row)
+            self._metadata_rows = {key: np.asarray(found, dtype=np.int64) for key, found in rows.items()}
+        return self._metadata_rows
+
+    def _filter_rows(self, filter):
+        """Rows matching a Chroma-style equality filter ({key: value}, {key: {"$eq": value}} or an $and of them)."""
+        conditions = filter["$and"] if "$and" in filter else [{key: value} for key, value in filter.items()]
+        index = self._index_metadata()
+        rows = None
+        for condition in conditions:
+            for key, value in condition.items():
+                if isinstance(value, dict):
+                    if set(value) != {"$eq"}:
+                        raise ValueError(f"Snapshot filters only support equality, got {value}")
+                    value = value["$eq"]
+                matched = index.get(_index_key(key, value), np.empty(0, dtype=np.int64))
+                rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        return rows
+
+    def search_with_vectors(self, embedding, k=4, filter=None):
+        """(Document, distance, vector) triples for the k nearest rows."""
+        query = np.asarray(embedding, dtype=np.float32)
+        distances = self._distances(query)
+        rows = self._filter_rows(filter) if filter else None
+        candidates = distances if rows is None else distances[rows]
+        top = _nearest(candidates, k)
+        if rows is not None:
+            top = rows[top]
+        return [
+            (self._document(int(row)), float(distances[row]), self.vectors[row].astype(np.float32))
+            for row in top
+        ]
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k=4, filter=None):
+        return [(doc, distance) for doc, distance, _ in self.search_with_vectors(embedding, k, filter)]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, filter)]
+
+    def similarity_search(self, query, k=4, filter=None):
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k, filter)
+
+def import_snapshot(path, persist_directory, embedding_function, batch_size=EXPORT_PAGE):
+    """Load a snapshot into a (new) Chroma directory without re-embedding; returns the store."""
+    from langchain.vectorstores import Chroma
+
+    snapshot = SnapshotStore(path)
+    manifest = snapshot.manifest
+    store = Chroma(
+        persist_directory=str(persist_directory),
+        embedding_function=embedding_function,
+        collection_metadata={"hnsw:space": manifest["distance"]},
+    )
+    for start in range(0, manifest["count"], batch_size):
+        end = min(start + batch_size, manifest["count"])
+        store._collection.upsert(
+            ids=snapshot._ids[start:end],
+            embeddings=snapshot.vectors[start:end].astype(np.float32).tolist(),
+            documents=snapshot._texts[start:end],
+            metadatas=[json.loads(m) or None for m in snapshot._metadatas[start:end]],
+        )
+    write_store_meta(persist_directory, embedding_version=snapshot.embedding_version)
+    mark_ingest(persist_directory)
+    return store
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import compact vector snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="Chroma directory -> snapshot")
+    export_cmd.add_argument("persist_directory")
+    export_cmd.add_argument("out_dir")
+    import_cmd = sub.add_parser("import", help="snapshot -> Chroma directory")
+    import_cmd.add_argument("snapshot_dir")
+    import_cmd.add_argument("persist_directory")
+    args = parser.parse_args()
+
+    from langchain.vectorstores import Chroma
+    from embedding_provider import get_embedding_provider
+    from store_meta import stored_embedding_version
+    embedding = get_embedding_provider()
+
+    if args.command == "export":
+        # The vectors are copied as they are, so the snapshot records the version the store was built with
+        store = Chroma(persist_directory=args.persist_directory, embedding_function=embedding)
+        version = stored_embedding_version(args.persist_directory)
+        manifest = export_snapshot(store, args.out_dir, version.split(":", 1)[1].rsplit(":", 1)[0], version)
+        print(f"✅ Exported {manifest['count']} vectors ({manifest['dim']}d, {manifest['embedding_version']}) to {args.out_dir}")
+    else:
+        snapshot = SnapshotStore(args.snapshot_dir)
+        if not compatible(snapshot.embedding_version, embedding.version, snapshot.manifest["distance"]):
+            parser.error(f"Snapshot was embedded as {snapshot.embedding_version}, but the configured provider embeds as {embedding.version}")
+        manifest = snapshot.manifest
+        import_snapshot(args.snapshot_dir, args.persist_directory, embedding)
+        print(f"✅ Imported {manifest['count']} vectors into {args.persist_directory}")
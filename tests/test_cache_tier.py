@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from cache_tier import L1_MAX_TTL_S, CacheTier, LRUCache, connect_l2, key_digest
+from kv_standin import start_kv_server
+
+def test_lru_evicts_the_least_recently_used():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (1, None, 3)
+
+def test_key_digest_separates_parts():
+    assert key_digest("ab", "c") != key_digest("a", "bc")
+
+def test_l1_only_tier_gets_sets_and_deletes():
+    tier = CacheTier()
+    tier.set("answer", "k", "hello", ttl_s=60)
+    assert tier.get("answer", "k") == "hello"
+    tier.delete("answer", "k")
+    assert tier.get("answer", "k") is None
+    assert tier.stats == {"l1_hits": 1, "l2_hits": 0, "misses": 1}
+
+@pytest.fixture
+def shared_l2():
+    pytest.importorskip("redis")
+    server, url = start_kv_server()
+    yield connect_l2(url)
+    server.shutdown()
+
+def test_replicas_share_entries_and_deletes_through_l2(shared_l2, monkeypatch):
+    first, second = CacheTier(shared_l2), CacheTier(shared_l2)
+    first.set("answer", "k", {"text": "hi"}, ttl_s=3600)
+    assert second.get("answer", "k") == {"text": "hi"}
+    assert second.stats["l2_hits"] == 1
+
+    first.delete("answer", "k")
+    # second's L1 copy outlives the delete only until the answer cap
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + L1_MAX_TTL_S["answer"] + 1)
+    assert second.get("answer", "k") is None
+
+def test_l1_entries_expire(monkeypatch):
+    tier = CacheTier()
+    tier.set("embedding", "k", [0.5], ttl_s=60)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert tier.get("embedding", "k") is None
+
+def test_missing_key_reads_none_without_tripping_the_breaker(shared_l2):
+    tier = CacheTier(shared_l2)
+    assert tier.get("answer", "nobody-wrote-this") is None
+    assert tier._l2_down_until == 0.0
+    tier.set("answer", "k", "hi", ttl_s=60)
+    assert CacheTier(shared_l2).get("answer", "k") == "hi"
+
+def test_unreachable_l2_falls_back_to_l1():
+    pytest.importorskip("redis")
+    tier = CacheTier(connect_l2("redis://127.0.0.1:1/0"))
+    tier.set("embedding", "k", [0.5], ttl_s=60)
+    assert tier.get("embedding", "k") == [0.5]
+    tier.delete("embedding", "k")
+    assert tier.get("embedding", "k") is None
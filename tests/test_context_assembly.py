@@ -0,0 +1,38 @@
+import numpy as np
+from langchain.schema import Document
+
+from context_assembly import assemble_context
+
+def _hit(text, vector):
+    return Document(page_content=text), 0.0, np.asarray(vector, dtype=np.float32)
+
+QUERY = [1.0, 0.0, 0.0]
+
+def test_empty_candidates_give_no_context():
+    assert assemble_context(QUERY, []) == []
+
+def test_near_duplicates_are_dropped_in_favour_of_the_better_hit():
+    candidates = [
+        _hit("copy", [0.98, 0.2, 0.0]),
+        _hit("best", [1.0, 0.19, 0.0]),
+        _hit("other", [0.6, 0.0, 0.8]),
+    ]
+    chosen = [doc.page_content for doc in assemble_context(QUERY, candidates)]
+    assert chosen == ["best", "other"]
+
+def test_mmr_prefers_novel_passages_over_redundant_ones():
+    candidates = [
+        _hit("a", [1.0, 0.3, 0.0]),
+        _hit("a-ish", [1.0, 0.45, 0.0]),
+        _hit("different", [0.8, 0.0, 0.6]),
+    ]
+    chosen = [doc.page_content for doc in assemble_context(QUERY, candidates, max_docs=2, mmr_lambda=0.5)]
+    assert chosen == ["a", "different"]
+
+def test_token_budget_truncates_and_stops():
+    long_text = "word " * 400
+    candidates = [_hit("first " + long_text, [1.0, 0.0, 0.0]), _hit("second " + long_text, [0.0, 1.0, 0.0])]
+    chosen = assemble_context(QUERY, candidates, token_budget=100)
+    assert len(chosen) == 1
+    assert chosen[0].page_content.endswith("…") and len(chosen[0].page_content) <= 401
+    assert candidates[0][0].page_content.startswith("first ") and not candidates[0][0].page_content.endswith("…")
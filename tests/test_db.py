@@ -0,0 +1,20 @@
+from pymongo.errors import ServerSelectionTimeoutError
+
+import db as db_module
+from mongo_standin import StandInClient
+
+def test_get_db_survives_index_failure_and_backs_off(monkeypatch):
+    calls = []
+
+    def failing_ensure_indexes():
+        calls.append(1)
+        raise ServerSelectionTimeoutError("no servers available")
+
+    monkeypatch.setattr(db_module, "ensure_indexes", failing_ensure_indexes)
+    db_module.set_client(StandInClient())
+    try:
+        assert db_module.get_app_db().name == db_module.APP_DB_NAME
+        assert db_module.get_bot_db().name == db_module.BOT_DB_NAME
+        assert calls == [1]   # the second call falls inside the retry window
+    finally:
+        db_module.set_client(None)
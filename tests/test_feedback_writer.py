@@ -0,0 +1,114 @@
+import datetime
+
+from bson import ObjectId
+from pymongo.errors import AutoReconnect
+
+from feedback_writer import FeedbackWriter
+from mongo_standin import StandInClient
+
+class FlakyCollection:
+    """Wraps the feedback collection so the first insert_many stores part of the batch and then times out."""
+
+    def __init__(self, collection, store_first):
+        self.collection = collection
+        self.store_first = store_first
+
+    def insert_many(self, docs, ordered=True):
+        if self.store_first is not None:
+            self.collection.insert_many(docs[:self.store_first], ordered=ordered)
+            self.store_first = None
+            raise AutoReconnect("timed out")
+        return self.collection.insert_many(docs, ordered=ordered)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+class FlakyDatabase:
+    def __init__(self, db, store_first):
+        self.db = db
+        self.feedback = FlakyCollection(db["feedback"], store_first)
+
+    def __getitem__(self, name):
+        return self.feedback if name == "feedback" else self.db[name]
+
+def _event(question, vote="👎"):
+    return {
+        "_id": ObjectId(), "user": "u1", "question": question, "response": "r",
+        "feedback": vote, "timestamp": datetime.datetime(2026, 1, 1, 12, 0, 0),
+    }
+
+def _writer(db, tmp_path, after_flush=None):
+    writer = FeedbackWriter(db, after_flush=after_flush, flush_interval=0.05, spill_path=tmp_path / "spill.jsonl")
+    writer.close()   # stop the background thread; the tests flush explicitly
+    return writer
+
+def _question_downs(db, question):
+    doc = db["feedback_counters"].find_one({"scope": "question", "question_key": question, "user": None})
+    return (doc or {}).get("down", 0)
+
+def test_spill_keeps_ids_and_replay_counts_each_event_once(tmp_path):
+    db = StandInClient().get_database("test")
+    writer = _writer(FlakyDatabase(db, store_first=2), tmp_path)
+    batch = [_event("q1"), _event("q2"), _event("q3")]
+
+    writer.flush(list(batch))
+    assert db["feedback"].count_documents({}) == 2
+    assert writer._read_spill()[0]["_id"] == batch[0]["_id"]
+
+    writer.flush([])
+    assert db["feedback"].count_documents({}) == 3
+    assert not writer.spill_path.exists()
+    # The two stored before the timeout are not inserted again, but they are counted on replay
+    assert [_question_downs(db, q) for q in ("q1", "q2", "q3")] == [1, 1, 1]
+    writer.flush([])
+    assert [_question_downs(db, q) for q in ("q1", "q2", "q3")] == [1, 1, 1]
+
+def test_hook_sees_only_newly_written_events(tmp_path):
+    db = StandInClient().get_database("test")
+    seen = []
+    writer = _writer(db, tmp_path, after_flush=lambda _db, events: seen.extend(e["question"] for e in events))
+    stored = _event("q1")
+    db["feedback"].insert_one(dict(stored))
+
+    writer.flush([stored, _event("q2")])
+    assert seen == ["q2"]
+    assert db["feedback"].count_documents({}) == 2
+
+def test_run_loop_survives_a_failing_hook(tmp_path):
+    db = StandInClient().get_database("test")
+    calls = []
+
+    def hook(_db, events):
+        calls.append(len(events))
+        raise RuntimeError("boom")
+
+    writer = FeedbackWriter(db, after_flush=hook, flush_interval=0.01, spill_path=tmp_path / "spill.jsonl")
+    try:
+        writer.submit("u1", "q1", "r", "👍")
+        writer._stopped.wait(0.2)
+        writer.submit("u1", "q2", "r", "👍")
+        writer._stopped.wait(0.2)
+        assert writer._thread.is_alive()
+    finally:
+        writer.close()
+    assert db["feedback"].count_documents({}) == 2
+    assert len(calls) >= 2
+
+def test_hooks_from_different_pages_all_run_once(tmp_path):
+    db = StandInClient().get_database("test")
+    calls = []
+
+    def learn(_db, events):
+        calls.append("learn")
+
+    def make_refresh():
+        def refresh(_db, events):
+            calls.append("refresh")
+        return refresh
+
+    writer = _writer(db, tmp_path, after_flush=learn)
+    writer.add_hook(learn)
+    writer.add_hook(make_refresh())
+    writer.add_hook(make_refresh())   # re-defined by a rerun of the page
+    writer.flush([_event("q1")])
+    assert calls == ["learn", "refresh"]
@@ -0,0 +1,70 @@
+import datetime
+
+from guidance_index import GuidanceIndex, tokenize
+from mongo_standin import StandInClient
+
+STAMP = datetime.datetime(2026, 1, 1, 12, 0, 0)
+
+def _pattern(question, stamp=STAMP):
+    return {
+        "question_pattern": question,
+        "guidance": f"guidance for {question}",
+        "bad_response_examples": ["too generic"],
+        "created_at": stamp,
+    }
+
+def _collection():
+    return StandInClient().get_database("test")["blocked_patterns"]
+
+def test_tokenize_drops_stopwords_and_short_tokens():
+    assert tokenize("How do I stop feeling anxious at work?") == {"stop", "anxious", "work"}
+
+def test_match_ranks_rarer_tokens_higher():
+    collection = _collection()
+    collection.insert_many([
+        _pattern("anxious about work deadlines"),
+        _pattern("anxious about exams"),
+        _pattern("anxious about dating"),
+    ])
+    index = GuidanceIndex(collection)
+    best = index.match("my exams make me anxious", top_k=1)[0]
+    assert best["guidance"] == "guidance for anxious about exams"
+
+def test_refresh_picks_up_patterns_sharing_the_last_stamp():
+    collection = _collection()
+    collection.insert_one(_pattern("lonely after moving"))
+    index = GuidanceIndex(collection)
+    assert index.match("lonely")
+    # Written in the same instant as the pattern already read
+    collection.insert_one(_pattern("grief after losing a parent"))
+    index.request_refresh()
+    assert index.match("grief parent")
+    assert len(index._patterns) == 2
+
+def test_refresh_skips_unchanged_patterns():
+    collection = _collection()
+    collection.insert_one(_pattern("lonely after moving"))
+    index = GuidanceIndex(collection)
+    index.refresh(force=True)
+    index.refresh(force=True)
+    assert len(index._patterns) == 1
+    assert index._postings["lonely"] == {"lonely after moving"}
+
+def test_guidance_for_formats_matches():
+    collection = _collection()
+    collection.insert_one(_pattern("panic attacks at night"))
+    guidance = GuidanceIndex(collection).guidance_for("panic attacks")
+    assert "⚠️ Guidance: guidance for panic attacks at night" in guidance
+    assert "❌ Avoid responses like: too generic" in guidance
+
+def test_refresh_drops_patterns_removed_alongside_an_insert():
+    collection = _collection()
+    collection.insert_many([_pattern("can't sleep at night"), _pattern("cannot sleep at night")])
+    index = GuidanceIndex(collection)
+    assert len(index.match("sleep night")) == 2
+    # What cluster_downvoted.py does: learn the representative, delete the duplicate
+    collection.delete_many({"question_pattern": "cannot sleep at night"})
+    collection.insert_one(_pattern("work stress", stamp=STAMP + datetime.timedelta(seconds=1)))
+    index.request_refresh()
+    assert [p["guidance"] for p in index.match("sleep night")] == ["guidance for can't sleep at night"]
+    assert set(index._patterns) == {"can't sleep at night", "work stress"}
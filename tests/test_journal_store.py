@@ -0,0 +1,54 @@
+import datetime
+
+import pytest
+
+import journal_store
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_store, "JOURNAL_DIR", tmp_path)
+    journal_store._index_cache.clear()
+    return tmp_path
+
+def _day(day, hour=9):
+    return datetime.datetime(2026, 3, day, hour)
+
+def test_pages_are_newest_first():
+    for day in range(1, 6):
+        journal_store.append_entry("ana", f"entry {day}", _day(day))
+    assert [e["text"] for e in journal_store.read_page("ana", 0, per_page=2)] == ["entry 5", "entry 4"]
+    assert [e["text"] for e in journal_store.read_page("ana", 2, per_page=2)] == ["entry 1"]
+    assert journal_store.list_dates("ana")[0] == "2026-03-05"
+
+def test_entries_between_reads_only_the_latest_rows(monkeypatch):
+    for day in range(1, 8):
+        journal_store.append_entry("ana", f"entry {day}", _day(day))
+    read_rows = []
+    real_read = journal_store._read
+    monkeypatch.setattr(journal_store, "_read", lambda user, rows: read_rows.append(len(rows)) or real_read(user, rows))
+
+    entries = journal_store.entries_between("ana", "2026-03-02", "2026-03-06", latest=2)
+    assert [e["text"] for e in entries] == ["entry 5", "entry 6"]
+    assert read_rows == [2]
+    assert journal_store.count_between("ana", "2026-03-02", "2026-03-06") == 5
+    assert len(journal_store.entries_between("ana", "2026-03-02", "2026-03-06")) == 5
+
+def test_read_since_resumes_after_the_last_entry():
+    journal_store.append_entry("ana", "first", _day(1))
+    (resume, _), = journal_store.read_since("ana", 0)
+    journal_store.append_entry("ana", "second", _day(2))
+    assert [entry["text"] for _, entry in journal_store.read_since("ana", resume)] == ["second"]
+
+def test_legacy_import_keeps_blank_lines_inside_an_entry(journal_dir):
+    legacy = journal_dir / "legacy"
+    legacy.mkdir()
+    (legacy / "2025-06-09.txt").write_text(
+        "2025-06-09T18:04:43.356545\nwent to the water park\n\nfelt relieved\n\n"
+        "2025-06-09T21:10:00\nshort evening note\n\n",
+        encoding="utf-8",
+    )
+    assert journal_store.import_legacy_files("ana", legacy) == 2
+    first, second = journal_store.entries_between("ana", "2025-06-09", "2025-06-09")
+    assert first["text"] == "went to the water park\n\nfelt relieved"
+    assert first["ts"] == "2025-06-09T18:04:43.356545"
+    assert second["text"] == "short evening note"
@@ -0,0 +1,54 @@
+import threading
+import time
+
+import load_shedding
+from answer_cache import SemanticAnswerCache
+from load_shedding import BUSY_MESSAGE, EMPATHETIC_PREAMBLE, GenerationGate, degraded_answer
+from session_records import RetrievedHit
+
+def test_requests_beyond_the_queue_depth_are_shed():
+    gate = GenerationGate(max_concurrent=1, max_queue=1)
+    started, release = threading.Event(), threading.Event()
+
+    def generate():
+        started.set()
+        return release.wait(5)
+
+    results = []
+    running = threading.Thread(target=lambda: results.append(gate.run(generate, deadline_s=5)))
+    running.start()
+    started.wait(5)   # the first request holds the only slot
+    waiting = threading.Thread(target=lambda: results.append(gate.run(lambda: "second", deadline_s=5)))
+    waiting.start()
+    while gate.queue_depth < 1:
+        time.sleep(0.01)
+
+    assert gate.run(lambda: "third") == (None, "overloaded")
+    release.set()
+    running.join()
+    waiting.join()
+    assert sorted(results, key=str) == [("second", None), (True, None)]
+
+def test_slow_generation_misses_the_deadline():
+    gate = GenerationGate(max_concurrent=1, max_queue=1)
+    assert gate.run(time.sleep, 0.5, deadline_s=0.05) == (None, "deadline")
+    # The slot is held until the abandoned generation finishes, so the next wait times out too
+    assert gate.run(lambda: "next", deadline_s=0.05) == (None, "deadline")
+    assert gate.run(lambda: "next", deadline_s=1) == ("next", None)
+
+def test_failed_generation_is_a_shed_reason():
+    def generate():
+        raise ConnectionError("ollama is down")
+
+    assert GenerationGate().run(generate) == (None, "error")
+
+def test_fallback_order_skips_answers_rated_down(monkeypatch):
+    cache = SemanticAnswerCache()
+    monkeypatch.setattr(load_shedding, "answer_cache", cache)
+    hit = RetrievedHit("d1", 0.2, "Question: q\nResponse: try a short walk")
+    cache.add("u1", [1.0, 0.0], "earlier answer")
+
+    assert degraded_answer("u1", [1.0, 0.0], [hit]) == ("earlier answer", "cached")
+    cache.discard("u1", "earlier answer")
+    assert degraded_answer("u1", [1.0, 0.0], [hit]) == (EMPATHETIC_PREAMBLE + "try a short walk", "counsel")
+    assert degraded_answer("u1", [1.0, 0.0], []) == (BUSY_MESSAGE, "busy")
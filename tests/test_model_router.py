@@ -0,0 +1,27 @@
+from model_router import LONG_CONVERSATION_MESSAGES, RouteMetrics, choose_route, route_features
+
+def test_small_talk_early_goes_to_small_model():
+    assert choose_route(route_features("thanks!", [0.2], turn_count=1)) == "small"
+
+def test_small_talk_deep_in_conversation_goes_to_large_model():
+    features = route_features("no", [1.5], turn_count=LONG_CONVERSATION_MESSAGES)
+    assert features["small_talk"]
+    assert choose_route(features) == "large"
+
+def test_long_question_goes_to_large_model():
+    question = "I have been feeling anxious every morning before work and cannot sleep"
+    assert choose_route(route_features(question, [1.5], turn_count=0)) == "large"
+
+def test_short_question_close_to_a_topic_goes_to_large_model():
+    assert choose_route(route_features("panic attacks again", [0.4], turn_count=0)) == "large"
+    assert choose_route(route_features("panic attacks again", [1.4], turn_count=0)) == "small"
+
+def test_route_metrics_snapshot():
+    metrics = RouteMetrics()
+    for seconds in (0.1, 0.2, 0.3):
+        metrics.record_latency("small", seconds)
+    metrics.record_feedback("small", "👎")
+    stats = metrics.snapshot()["small"]
+    assert stats["requests"] == 3
+    assert stats["p50_ms"] == 200.0
+    assert stats["feedback"] == {"👍": 0, "👎": 1}
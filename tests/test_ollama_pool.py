@@ -0,0 +1,89 @@
+import json
+import socket
+import time
+
+import pytest
+import requests
+
+from ollama_pool import OllamaEndpointPool
+from stub_ollama import STUB_REPLY, start_stub_server
+
+def _dead_url():
+    """A local port with nothing listening on it."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+@pytest.fixture
+def live_url():
+    server, url = start_stub_server()
+    yield url
+    server.shutdown()
+
+def _embed(url):
+    response = requests.post(f"{url}/api/embed", json={"model": "stub", "input": ["hi"]}, timeout=2)
+    response.raise_for_status()
+    return url, response.json()["embeddings"]
+
+def _generate(url):
+    with requests.post(f"{url}/api/generate", json={"model": "stub", "prompt": "hi"}, stream=True, timeout=2) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            chunk = json.loads(line)
+            if not chunk["done"]:
+                yield chunk["response"]
+
+def _fail(url):
+    raise RuntimeError("model loading")
+
+def test_call_retries_on_another_node_and_marks_the_dead_one(live_url):
+    dead_url = _dead_url()
+    pool = OllamaEndpointPool("test", [dead_url, live_url], probe_interval=0)
+
+    url, embeddings = pool.call(_embed)   # both look healthy and idle, so the dead one is tried first
+    assert url == live_url and len(embeddings[0]) == 768
+    assert pool.stats() == {
+        dead_url: {"healthy": False, "outstanding": 0},
+        live_url: {"healthy": True, "outstanding": 0},
+    }
+    # Healthy nodes are preferred from then on
+    assert pool.call(lambda url: url) == live_url
+
+def test_stream_retries_before_the_first_chunk(live_url):
+    dead_url = _dead_url()
+    pool = OllamaEndpointPool("test", [dead_url, live_url], probe_interval=0)
+
+    assert "".join(pool.stream(_generate)) == STUB_REPLY
+    assert pool.stats()[dead_url]["healthy"] is False
+    assert all(stat["outstanding"] == 0 for stat in pool.stats().values())
+
+def test_calls_go_to_the_node_with_fewest_outstanding_requests(live_url):
+    other_server, other_url = start_stub_server()
+    try:
+        pool = OllamaEndpointPool("test", [live_url, other_url], probe_interval=0)
+        open_stream = pool.stream(_generate)
+        next(open_stream)   # holds one request open on the first node
+        assert pool.stats()[live_url]["outstanding"] == 1
+        url, _ = pool.call(_embed)
+        assert url == other_url
+        open_stream.close()
+        assert pool.stats()[live_url]["outstanding"] == 0
+    finally:
+        other_server.shutdown()
+
+def test_health_probe_marks_dead_nodes_in_the_background(live_url):
+    dead_url = _dead_url()
+    pool = OllamaEndpointPool("test", [dead_url, live_url], probe_interval=0.05)
+    deadline = time.monotonic() + 5
+    while pool.stats()[dead_url]["healthy"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.stats()[dead_url]["healthy"] is False
+    assert pool.stats()[live_url]["healthy"] is True
+
+def test_probe_brings_a_recovered_node_back(live_url):
+    pool = OllamaEndpointPool("test", [_dead_url(), live_url], probe_interval=0)
+    with pytest.raises(RuntimeError):
+        pool.call(_fail)
+    assert pool.stats()[live_url]["healthy"] is False   # a failed call marks the node it ran on
+    assert pool.probe(live_url) is True
+    assert pool.call(lambda url: url) == live_url
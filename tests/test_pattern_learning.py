@@ -0,0 +1,56 @@
+import datetime
+
+import pytest
+
+from feedback_counters import DOWNVOTE_THRESHOLD, normalize_question
+from mongo_standin import StandInClient
+from pattern_learning import SAMPLE_BAD_RESPONSES, cluster_representatives, learn_from_votes, rebuild_patterns
+
+BUILD = datetime.datetime(2026, 1, 1)
+
+def _db_with_cluster():
+    db = StandInClient().get_database("test")
+    db["downvote_clusters_meta"].insert_one({"_id": "current", "build_id": BUILD})
+    db["downvote_clusters"].insert_many([
+        {"representative": "How do I stop panicking?", "build_id": BUILD,
+         "member_keys": ["how do i stop panicking?", "how can i stop panicking?"]},
+        # A stale build that the meta no longer points to
+        {"representative": "old", "build_id": BUILD - datetime.timedelta(days=1),
+         "member_keys": ["how do i sleep?"]},
+    ])
+    return db
+
+def _downvoted(db, question):
+    db["feedback_counters"].insert_one({
+        "scope": "question", "question_key": normalize_question(question), "user": None,
+        "down": DOWNVOTE_THRESHOLD, "question": question,
+    })
+    db["feedback"].insert_one({"question": question, "response": "bad answer", "feedback": "👎"})
+    return {"question": question, "feedback": "👎"}
+
+def test_cluster_representatives_follow_the_published_build():
+    assert cluster_representatives(_db_with_cluster()) == {
+        "how do i stop panicking?": "How do I stop panicking?",
+        "how can i stop panicking?": "How do I stop panicking?",
+    }
+
+def test_clustered_duplicate_is_learned_as_its_representative():
+    db = _db_with_cluster()
+    events = [_downvoted(db, "How can I stop panicking?"), _downvoted(db, "How do I sleep?")]
+
+    assert learn_from_votes(db, events) == ["How do I stop panicking?", "How do I sleep?"]
+    patterns = {doc["question_pattern"] for doc in db["blocked_patterns"].find({})}
+    assert patterns == {"How do I stop panicking?", "How do I sleep?"}
+
+@pytest.mark.parametrize("server_version", [(7, 0, 0), (5, 0, 0)])
+def test_rebuild_samples_bad_responses_on_old_and_new_servers(server_version):
+    db = StandInClient(server_version=server_version).get_database("test")
+    db["feedback"].insert_many(
+        [{"question": "Why can't I focus?", "response": f"bad {i}", "feedback": "👎"} for i in range(DOWNVOTE_THRESHOLD)]
+        + [{"question": "Why can't I focus?", "response": "good", "feedback": "👍"},
+           {"question": "Rarely downvoted", "response": "meh", "feedback": "👎"}]
+    )
+    assert rebuild_patterns(db) == 1
+    pattern = db["blocked_patterns"].find_one({})
+    assert pattern["question_pattern"] == "Why can't I focus?"
+    assert pattern["bad_response_examples"] == [f"bad {i}" for i in range(SAMPLE_BAD_RESPONSES)]
@@ -0,0 +1,53 @@
+import numpy as np
+from langchain.schema import Document
+
+from session_retrieval import MAX_LOCAL_TURNS, SessionRetrieval
+
+RNG = np.random.default_rng(1)
+# Unnormalised store vectors, like the legacy /api/embeddings stores
+COUNSEL = RNG.normal(size=(30, 8)).astype(np.float32) * 5.0
+EMPATHY = RNG.normal(size=(30, 8)).astype(np.float32) * 5.0
+
+class FakeStores:
+    def __init__(self):
+        self.calls = 0
+
+    def _search(self, vectors, query, n):
+        distances = np.sum((vectors - query) ** 2, axis=1)
+        return [(Document(page_content=f"doc {i}"), float(distances[i]), vectors[i].tolist()) for i in np.argsort(distances)[:n]]
+
+    def fetch(self, vector, n):
+        self.calls += 1
+        query = np.asarray(vector, dtype=np.float32)
+        return self._search(COUNSEL, query, n), self._search(EMPATHY, query, n)
+
+def test_full_fetch_distances_match_the_store_for_the_raw_question():
+    stores = FakeStores()
+    question = COUNSEL[3] + 0.1
+    counsel, empathy, mode = SessionRetrieval().retrieve(question.tolist(), stores.fetch, k=3)
+    assert mode == "full"
+    expected = stores._search(COUNSEL, question, 3)
+    assert [doc.page_content for doc, _, _ in counsel] == [doc.page_content for doc, _, _ in expected]
+    assert np.allclose([d for _, d, _ in counsel], [d for _, d, _ in expected], rtol=1e-4)
+    assert len(empathy) == 3
+
+def test_on_topic_follow_ups_rerank_locally_until_the_limit():
+    stores, retrieval = FakeStores(), SessionRetrieval()
+    question = COUNSEL[3]
+    modes = [retrieval.retrieve((question * (1 + 0.01 * i)).tolist(), stores.fetch, k=2)[2] for i in range(MAX_LOCAL_TURNS + 2)]
+    assert modes == ["full"] + ["local"] * MAX_LOCAL_TURNS + ["full"]
+    assert stores.calls == 2
+
+def test_topic_shift_goes_back_to_the_stores():
+    stores, retrieval = FakeStores(), SessionRetrieval()
+    retrieval.retrieve(COUNSEL[3].tolist(), stores.fetch, k=2)
+    assert retrieval.retrieve((-COUNSEL[3]).tolist(), stores.fetch, k=2)[2] == "full"
+
+def test_pool_is_a_float32_matrix_with_interned_texts():
+    stores, retrieval = FakeStores(), SessionRetrieval()
+    retrieval.retrieve(COUNSEL[0].tolist(), stores.fetch, k=2)
+    counsel_pool, _ = retrieval._pool
+    assert counsel_pool.vectors.dtype == np.float32 and counsel_pool.vectors.shape == (20, 8)
+    other = SessionRetrieval()
+    other.retrieve(COUNSEL[0].tolist(), stores.fetch, k=2)
+    assert other._pool[0].texts[0] is counsel_pool.texts[0]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from embedding_provider import HashingEmbeddings, provider_for_stores
+from store_meta import (
+    UNSTAMPED_VERSION, EmbeddingVersionMismatch, check_embedding_version, read_store_meta, stored_embedding_version,
+    write_store_meta,
+)
+
+class RawHashingEmbeddings(HashingEmbeddings):
+    """Same directions as HashingEmbeddings but not unit length, like the old /api/embeddings vectors."""
+
+    def __init__(self):
+        super().__init__()
+        self.version = f"hashing:{self.model}:raw"
+
+    def embed_query(self, text):
+        return [3.0 * v for v in super().embed_query(text)]
+
+def test_new_store_is_stamped_with_the_provider_version(tmp_path):
+    check_embedding_version(tmp_path / "store", HashingEmbeddings())
+    assert read_store_meta(tmp_path / "store") == {"embedding_version": "hashing:hashing-768:unit"}
+
+def test_unstamped_store_with_data_is_treated_as_legacy(tmp_path):
+    (tmp_path / "chroma.sqlite3").write_bytes(b"")
+    assert stored_embedding_version(tmp_path) == UNSTAMPED_VERSION
+
+def test_l2_store_with_other_normalisation_refuses_to_open(tmp_path):
+    check_embedding_version(tmp_path, RawHashingEmbeddings())
+    with pytest.raises(EmbeddingVersionMismatch, match="reembed_store.py"):
+        check_embedding_version(tmp_path, HashingEmbeddings())
+    # Cosine distance ignores vector length, so only the provider and model have to match
+    check_embedding_version(tmp_path, HashingEmbeddings(), space="cosine")
+
+def test_reembed_rewrites_vectors_and_stamp(tmp_path):
+    pytest.importorskip("chromadb")
+    from reembed_store import reembed_directory
+    from store_meta import open_chroma
+
+    raw = RawHashingEmbeddings()
+    store = open_chroma(tmp_path, raw)
+    store.add_texts(["breathing exercises help", "talk to a friend"], ids=["a", "b"])
+
+    unit = HashingEmbeddings()
+    assert reembed_directory(tmp_path, unit) == 2
+    assert stored_embedding_version(tmp_path) == unit.version
+    stored = open_chroma(tmp_path, unit)._collection.get(ids=["a"], include=["embeddings"])["embeddings"][0]
+    assert np.allclose(stored, unit.embed_query("breathing exercises help"), atol=1e-6)
+
+def test_auto_provider_follows_the_stores_stamp(tmp_path):
+    counsel, empathy = tmp_path / "chroma_db", tmp_path / "chroma_db_empathy"
+    assert provider_for_stores((counsel, empathy)) == "ollama"   # fresh checkout
+
+    for directory in (counsel, empathy):
+        directory.mkdir()
+        (directory / "chroma.sqlite3").write_bytes(b"")
+    assert provider_for_stores((counsel, empathy)) == "ollama-legacy"   # as shipped
+
+    write_store_meta(counsel, embedding_version="ollama:nomic-embed-text:unit")
+    with pytest.raises(EmbeddingVersionMismatch, match="reembed_store.py"):
+        provider_for_stores((counsel, empathy))
+    write_store_meta(empathy, embedding_version="ollama:nomic-embed-text:unit")
+    assert provider_for_stores((counsel, empathy)) == "ollama"   # after reembed_store.py
@@ -0,0 +1,33 @@
+import pytest
+
+import tracing
+
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "METRICS_DIR", tmp_path)
+    monkeypatch.setattr(tracing, "TRACES_PATH", tmp_path / "traces.jsonl")
+    monkeypatch.setattr(tracing, "PROM_PATH", tmp_path / "rag.prom")
+    monkeypatch.setattr(tracing, "_recent", tracing.deque(maxlen=3))
+    monkeypatch.setattr(tracing, "_stage_totals", {})
+    return tmp_path
+
+def test_summary_sum_and_count_are_lifetime_totals():
+    for seconds in (1.0, 2.0, 3.0, 4.0, 5.0):
+        tracing.record_trace({"total": seconds, "route": "small"})
+    text = tracing.prometheus_text()
+    assert 'rag_stage_seconds_sum{stage="total"} 15.000000' in text
+    assert 'rag_stage_seconds_count{stage="total"} 5' in text
+    assert tracing.stage_percentiles()["total"]["count"] == 3   # quantiles stay on the recent window
+    assert "route" not in tracing.stage_percentiles()
+
+def test_traces_are_written_in_the_background_and_rotated(metrics_dir, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACES_MAX_BYTES", 200)
+    monkeypatch.setattr(tracing, "TRACES_BACKUPS", 2)
+    for i in range(40):
+        tracing.record_trace({"total": 0.1, "turn": i})
+        if i % 5 == 4:
+            tracing.flush_traces()
+    tracing.flush_traces()
+    files = sorted(path.name for path in metrics_dir.glob("traces.jsonl*"))
+    assert files == ["traces.jsonl", "traces.jsonl.1", "traces.jsonl.2"]
+    assert all(path.stat().st_size < 1000 for path in metrics_dir.glob("traces.jsonl*"))
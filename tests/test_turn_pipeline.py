@@ -0,0 +1,72 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+@pytest.fixture(scope="module")
+def pipeline(tmp_path_factory):
+    """turn_pipeline imported in an empty working directory, so its stores are fresh and empty."""
+    workdir = tmp_path_factory.mktemp("turn")
+    shutil.copytree(REPO_ROOT / "templates", workdir / "templates")
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import turn_pipeline
+        yield turn_pipeline
+    finally:
+        os.chdir(previous)
+
+class NoGeneration:
+    queue_depth = 0
+
+    def run(self, *args, **kwargs):
+        raise AssertionError("a cached answer must not enter the generation gate")
+
+def _turn(pipeline, question):
+    return pipeline.run_turn(
+        question,
+        is_blocked=lambda: False,
+        get_guidance=lambda: "",
+        get_summary=lambda: "",
+        build_query=lambda summary, guidance: question,
+    )
+
+def test_cached_answer_is_served_before_the_gate_and_dropped_on_downvote(pipeline, monkeypatch):
+    import rag_chain
+    from cache_tier import cache, key_digest
+
+    question = "how do I calm down before exams?"
+    # Seed the query embedding so no embedding server is needed
+    cache.set("embedding", key_digest(rag_chain.embedding.version, question), [0.1] * 768, ttl_s=60)
+    key = rag_chain.answer_key(question, [], "small")
+    cache.set("answer", key, "cached reply", ttl_s=60)
+    monkeypatch.setattr(pipeline, "generation_gate", NoGeneration())
+
+    result = _turn(pipeline, question)
+    assert result["response"] == "cached reply"
+    assert result["answer_key"] == key
+    assert "answer_cache" in result["timings"] and "generation" not in result["timings"]
+
+    rag_chain.forget_answer(key)
+    assert rag_chain.cached_answer(key) is None
+
+def test_downvoted_precomputed_answer_goes_back_for_review(pipeline):
+    import answer_store
+
+    vector = [1.0] + [0.0] * 767
+    answer_store.answer_store._collection.add(
+        ids=["a-0"], embeddings=[vector], documents=["how do I sleep better?"],
+        metadatas=[{"answer": "try a wind-down routine", "cluster_id": 0, "store_version": answer_store.STORE_VERSION,
+                    "vetted": True, "reviewed": True}],
+    )
+    assert answer_store.lookup_precomputed(vector) == ("try a wind-down routine", 0)
+
+    pipeline.retire_answer("u1", "try a wind-down routine", cluster_id=0)
+    assert answer_store.lookup_precomputed(vector) is None
+    metadata = answer_store.answer_store._collection.get(ids=["a-0"])["metadatas"][0]
+    assert (metadata["vetted"], metadata["reviewed"], metadata["flagged"]) == (True, False, "👎 from u1")
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")   # parquet engine for records.parquet
+
+from store_meta import EmbeddingVersionMismatch
+from vector_snapshot import FORMAT_VERSION, MANIFEST_FILE, RECORDS_FILE, VECTORS_FILE, SnapshotStore
+
+def _write_snapshot(path, vectors, metadatas, distance="l2", version="hashing:hashing-4:unit"):
+    path.mkdir()
+    np.save(path / VECTORS_FILE, vectors.astype(np.float16))
+    pd.DataFrame({
+        "id": [str(i) for i in range(len(vectors))],
+        "text": [f"doc {i}" for i in range(len(vectors))],
+        "metadata": [json.dumps(m) for m in metadatas],
+    }).to_parquet(path / RECORDS_FILE, index=False)
+    (path / MANIFEST_FILE).write_text(json.dumps({
+        "format_version": FORMAT_VERSION, "model": "hashing-4", "embedding_version": version,
+        "dim": vectors.shape[1], "count": len(vectors), "dtype": "float16", "distance": distance,
+        "snapshot_id": "test", "created_at": "2026-01-01T00:00:00",
+    }), encoding="utf-8")
+    return path
+
+@pytest.fixture
+def snapshot(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 4))
+    metadatas = [{"topic": "sleep" if i % 3 == 0 else "anxiety", "reviewed": i % 2 == 0, "rank": i % 2} for i in range(200)]
+    return _write_snapshot(tmp_path / "snap", vectors, metadatas), vectors.astype(np.float16).astype(np.float32), metadatas
+
+def test_top_k_matches_a_full_sort(snapshot):
+    path, vectors, _ = snapshot
+    query = np.array([0.3, -1.0, 0.5, 2.0], dtype=np.float32)
+    expected = np.argsort(np.sum((vectors - query) ** 2, axis=1))[:5]
+
+    hits = SnapshotStore(path).search_with_vectors(query, k=5)
+    assert [doc.page_content for doc, _, _ in hits] == [f"doc {i}" for i in expected]
+    assert [d for _, d, _ in hits] == sorted(d for _, d, _ in hits)
+
+def test_filters_use_the_metadata_index(snapshot):
+    path, vectors, metadatas = snapshot
+    query = np.zeros(4, dtype=np.float32)
+    store = SnapshotStore(path)
+
+    hits = store.search_with_vectors(query, k=3, filter={"$and": [{"topic": "sleep"}, {"reviewed": True}]})
+    wanted = [i for i, m in enumerate(metadatas) if m["topic"] == "sleep" and m["reviewed"]]
+    expected = sorted(wanted, key=lambda i: float(np.sum(vectors[i] ** 2)))[:3]
+    assert [doc.page_content for doc, _, _ in hits] == [f"doc {i}" for i in expected]
+    assert all(doc.metadata["topic"] == "sleep" and doc.metadata["reviewed"] is True for doc, _, _ in hits)
+    assert store.search_with_vectors(query, k=3, filter={"topic": "missing"}) == []
+    with pytest.raises(ValueError, match="only support equality"):
+        store.search_with_vectors(query, k=3, filter={"topic": {"$ne": "sleep"}})
+
+def test_bool_and_int_metadata_are_distinct(snapshot):
+    path, _, _ = snapshot
+    store = SnapshotStore(path)
+    hits = store.search_with_vectors(np.zeros(4, dtype=np.float32), k=200, filter={"rank": 1})
+    assert len(hits) == 100 and all(doc.metadata["rank"] == 1 for doc, _, _ in hits)
+    assert store.search_with_vectors(np.zeros(4, dtype=np.float32), k=200, filter={"reviewed": {"$eq": 1}}) == []
+
+def test_k_larger_than_the_store_returns_everything(snapshot):
+    path, _, _ = snapshot
+    assert len(SnapshotStore(path).search_with_vectors(np.zeros(4, dtype=np.float32), k=500)) == 200
+
+def test_mismatched_embedding_version_refuses_to_open(snapshot):
+    path, _, _ = snapshot
+    with pytest.raises(EmbeddingVersionMismatch):
+        SnapshotStore(path, expected_version="ollama:nomic-embed-text:unit")